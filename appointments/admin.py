@@ -1,5 +1,46 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+from .forms import _PHONE_STRIP
 from .models import Appointment, AvailableDay
+from .views import invalidar_cache_fechas_disponibles
+
+
+class FasterAdminPaginator(Paginator):
+    """
+    Paginador para el admin que evita el COUNT(*) completo en listados sin filtros.
+    
+    En PostgreSQL, cuando el listado no tiene filtros aplicados, usa la
+    estimación de filas de pg_class (reltuples). Si la tabla es pequeña,
+    la estimación no está disponible o hay filtros, recurre al conteo normal.
+    """
+    
+    # Por debajo de este número de filas el conteo exacto es barato
+    UMBRAL_ESTIMACION = 10000
+    
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if connection.vendor != 'postgresql' or query is None or query.where:
+            return super().count
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [query.model._meta.db_table]
+            )
+            fila = cursor.fetchone()
+        
+        estimacion = fila[0] if fila else 0
+        if estimacion < self.UMBRAL_ESTIMACION:
+            return super().count
+        return estimacion
 
 
 @admin.register(Appointment)
@@ -11,8 +52,11 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_display = ['nombre_cliente', 'property', 'fecha_cita', 'tipo_cita', 'get_capacidad_info']
     list_filter = ['tipo_cita', 'fecha_cita']
     search_fields = ['nombre_cliente', 'email_cliente', 'property__nombre']
-    date_hierarchy = 'fecha_cita'
+    list_select_related = ('property',)
+    ordering = ('-fecha_cita',)
     readonly_fields = ['fecha_creacion', 'google_event_id']
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Información del Cliente', {
@@ -31,6 +75,37 @@ class AppointmentAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_fields(self, request):
+        """
+        Omite la búsqueda por nombre de propiedad cuando el término es un email
+        o un teléfono, evitando el JOIN con la tabla de propiedades.
+        """
+        termino = request.GET.get(SEARCH_VAR, '').strip()
+        if '@' in termino or termino.translate(_PHONE_STRIP).isdigit():
+            return ['nombre_cliente', 'email_cliente']
+        return super().get_search_fields(request)
+    
+    def get_queryset(self, request):
+        """
+        Anota la capacidad del día disponible correspondiente y el número de
+        citas de ese día, para que get_capacidad_info no consulte la base de
+        datos por cada fila. La propiedad se carga con list_select_related.
+        """
+        dia_disponible = AvailableDay.objects.filter(
+            fecha_disponible=OuterRef('fecha_dia'),
+            tipo_cita=OuterRef('tipo_cita')
+        ).values('capacidad_maxima')[:1]
+        citas_del_dia = Appointment.objects.filter(
+            fecha_cita__date=OuterRef('fecha_dia'),
+            tipo_cita=OuterRef('tipo_cita')
+        ).order_by().values('tipo_cita').annotate(total=Count('*')).values('total')
+        
+        queryset = super().get_queryset(request)
+        return queryset.annotate(fecha_dia=TruncDate('fecha_cita')).annotate(
+            capacidad_maxima_dia=Subquery(dia_disponible),
+            citas_dia_count=Coalesce(Subquery(citas_del_dia), 0)
+        )
+    
     def get_capacidad_info(self, obj):
         """
         Muestra información sobre la disponibilidad del día de la cita.
@@ -41,16 +116,12 @@ class AppointmentAdmin(admin.ModelAdmin):
         Returns:
             str: Información de capacidad formateada
         """
-        try:
-            dia_disponible = AvailableDay.objects.get(
-                fecha_disponible=obj.fecha_cita.date(),
-                tipo_cita=obj.tipo_cita
-            )
-            capacidad_disponible = dia_disponible.obtener_capacidad_disponible()
-            capacidad_maxima = dia_disponible.capacidad_maxima
-            return f"{capacidad_disponible}/{capacidad_maxima} disponibles"
-        except AvailableDay.DoesNotExist:
+        capacidad_maxima = obj.capacidad_maxima_dia
+        if capacidad_maxima is None:
             return "⚠️ Día no configurado"
+        
+        capacidad_disponible = max(0, capacidad_maxima - obj.citas_dia_count)
+        return f"{capacidad_disponible}/{capacidad_maxima} disponibles"
     
     get_capacidad_info.short_description = 'Capacidad del Día'
 
@@ -65,7 +136,8 @@ class AvailableDayAdmin(admin.ModelAdmin):
                     'get_citas_agendadas', 'get_capacidad_disponible', 'get_estado']
     list_filter = ['tipo_cita', 'fecha_disponible']
     search_fields = ['notas_admin']
-    date_hierarchy = 'fecha_disponible'
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
     readonly_fields = ['fecha_creacion', 'fecha_actualizacion', 
                       'get_citas_agendadas_detail', 'get_estado_detail']
     
@@ -86,6 +158,20 @@ class AvailableDayAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """
+        Anota cada día con el número de citas agendadas en una sola consulta.
+        
+        Evita que cada columna del listado ejecute su propio COUNT por fila.
+        También calcula en SQL si cada día ya pasó (`en_pasado`), con la
+        fecha de hoy tomada una sola vez y la misma regla que
+        AvailableDay.esta_en_el_pasado().
+        """
+        hoy = timezone.now().date()
+        return super().get_queryset(request).con_citas_count().annotate(
+            en_pasado=ExpressionWrapper(Q(fecha_disponible__lt=hoy), output_field=BooleanField())
+        )
+    
     def get_citas_agendadas(self, obj):
         """
         Muestra el número de citas agendadas para este día.
@@ -96,7 +182,7 @@ class AvailableDayAdmin(admin.ModelAdmin):
         Returns:
             int: Número de citas agendadas
         """
-        return obj.obtener_citas_agendadas().count()
+        return obj.citas_count
     
     get_citas_agendadas.short_description = 'Citas Agendadas'
     
@@ -110,7 +196,7 @@ class AvailableDayAdmin(admin.ModelAdmin):
         Returns:
             int: Espacios disponibles
         """
-        return obj.obtener_capacidad_disponible()
+        return max(0, obj.capacidad_maxima - obj.citas_count)
     
     get_capacidad_disponible.short_description = 'Espacios Disponibles'
     
@@ -124,9 +210,9 @@ class AvailableDayAdmin(admin.ModelAdmin):
         Returns:
             str: Estado formateado con emoji
         """
-        if obj.esta_en_el_pasado():
+        if obj.en_pasado:
             return "⏰ Pasado"
-        elif obj.esta_disponible():
+        elif obj.citas_count < obj.capacidad_maxima:
             return "✅ Disponible"
         else:
             return "❌ Lleno"
@@ -143,18 +229,26 @@ class AvailableDayAdmin(admin.ModelAdmin):
         Returns:
             str: Información detallada en formato HTML
         """
-        citas = obj.obtener_citas_agendadas()
-        if not citas.exists():
+        citas = list(
+            obj.obtener_citas_agendadas()
+            .select_related('property')
+            .only('nombre_cliente', 'fecha_cita', 'property__nombre')
+            .order_by('fecha_cita')
+        )
+        if not citas:
             return "No hay citas agendadas"
         
-        html = "<ul>"
-        for cita in citas:
-            html += f"<li>{cita.nombre_cliente} - {cita.property.nombre} - {cita.fecha_cita.strftime('%H:%M')}</li>"
-        html += "</ul>"
-        return html
+        items = format_html_join(
+            '',
+            '<li>{} - {} - {}</li>',
+            (
+                (cita.nombre_cliente, cita.property.nombre, cita.fecha_cita.strftime('%H:%M'))
+                for cita in citas
+            )
+        )
+        return format_html('<ul>{}</ul>', items)
     
     get_citas_agendadas_detail.short_description = 'Detalle de Citas'
-    get_citas_agendadas_detail.allow_tags = True
     
     def get_estado_detail(self, obj):
         """
@@ -166,25 +260,29 @@ class AvailableDayAdmin(admin.ModelAdmin):
         Returns:
             str: Información de estado detallada
         """
-        citas_count = obj.obtener_citas_agendadas().count()
-        capacidad_disp = obj.obtener_capacidad_disponible()
-        
-        info = f"<strong>Capacidad máxima:</strong> {obj.capacidad_maxima}<br>"
-        info += f"<strong>Citas agendadas:</strong> {citas_count}<br>"
-        info += f"<strong>Espacios disponibles:</strong> {capacidad_disp}<br>"
-        info += f"<strong>Estado:</strong> "
+        # Un solo COUNT: el resto del estado se deriva de este valor
+        citas_count = obj._citas_count()
+        capacidad_disp = max(0, obj.capacidad_maxima - citas_count)
         
         if obj.esta_en_el_pasado():
-            info += "⏰ Este día ya pasó"
-        elif obj.esta_disponible():
-            info += "✅ Disponible para nuevas citas"
+            estado = "⏰ Este día ya pasó"
+        elif capacidad_disp > 0:
+            estado = "✅ Disponible para nuevas citas"
         else:
-            info += "❌ Capacidad máxima alcanzada"
+            estado = "❌ Capacidad máxima alcanzada"
         
-        return info
+        return format_html(
+            "<strong>Capacidad máxima:</strong> {}<br>"
+            "<strong>Citas agendadas:</strong> {}<br>"
+            "<strong>Espacios disponibles:</strong> {}<br>"
+            "<strong>Estado:</strong> {}",
+            obj.capacidad_maxima,
+            citas_count,
+            capacidad_disp,
+            estado
+        )
     
     get_estado_detail.short_description = 'Estado Detallado'
-    get_estado_detail.allow_tags = True
     
     actions = ['marcar_como_no_disponible', 'aumentar_capacidad']
     
@@ -210,9 +308,24 @@ class AvailableDayAdmin(admin.ModelAdmin):
             request: HttpRequest
             queryset: QuerySet de días seleccionados
         """
-        for dia in queryset:
-            dia.capacidad_maxima += 1
-            dia.save()
-        self.message_user(request, f'Capacidad aumentada en {queryset.count()} día(s).')
+        # Días afectados, leídos antes del UPDATE para invalidar su cache
+        fechas_por_tipo = {}
+        for fecha, tipo_cita in queryset.values_list('fecha_disponible', 'tipo_cita'):
+            fechas_por_tipo.setdefault(tipo_cita, []).append(fecha)
+        
+        # Un solo UPDATE para todos los días seleccionados
+        count = queryset.update(
+            capacidad_maxima=F('capacidad_maxima') + 1,
+            fecha_actualizacion=timezone.now()
+        )
+        
+        # update() no emite señales: invalidar el cache de fechas a mano, ya
+        # confirmado el UPDATE, para que una reserva intermedia no vuelva a
+        # guardar la capacidad anterior
+        def invalidar():
+            for tipo_cita, fechas in fechas_por_tipo.items():
+                invalidar_cache_fechas_disponibles(fechas, tipo_cita)
+        transaction.on_commit(invalidar)
+        self.message_user(request, f'Capacidad aumentada en {count} día(s).')
     
     aumentar_capacidad.short_description = "➕ Aumentar capacidad en 1"
@@ -2,13 +2,20 @@ from django import forms
 from .models import Appointment
 from properties.models import Property
 
-class NormalAppointmentForm(forms.ModelForm):
+# Tabla de traducción para eliminar espacios y guiones del teléfono en una sola pasada
+_PHONE_STRIP = str.maketrans('', '', ' -')
+
+
+class BaseAppointmentForm(forms.ModelForm):
     """
-    Formulario para agendar una cita normal.
-    Solo requiere datos básicos del cliente y la fecha deseada.
-    El sistema identificará automáticamente la propiedad de interés.
+    Formulario base para agendar citas.
+    Define los campos, widgets y etiquetas comunes a ambos tipos de cita,
+    así como la validación del teléfono. Cada subclase indica su tipo de cita.
     """
     
+    # Tipo de cita que se asigna a la instancia (lo define cada subclase)
+    tipo_cita = None
+    
     class Meta:
         model = Appointment
         fields = [
@@ -48,11 +55,11 @@ class NormalAppointmentForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         """
-        Inicializa el formulario y establece el tipo de cita como 'normal'.
+        Inicializa el formulario y establece el tipo de cita de la subclase.
         """
         super().__init__(*args, **kwargs)
-        if self.instance:
-            self.instance.tipo_cita = 'normal'
+        if self.instance and self.tipo_cita:
+            self.instance.tipo_cita = self.tipo_cita
     
     def clean_telefono_cliente(self):
         """
@@ -60,7 +67,7 @@ class NormalAppointmentForm(forms.ModelForm):
         """
         telefono = self.cleaned_data.get('telefono_cliente')
         # Eliminar espacios y guiones
-        telefono_limpio = telefono.replace(' ', '').replace('-', '')
+        telefono_limpio = telefono.translate(_PHONE_STRIP)
         
         if not telefono_limpio.isdigit():
             raise forms.ValidationError('El teléfono debe contener solo números.')
@@ -71,87 +78,59 @@ class NormalAppointmentForm(forms.ModelForm):
         return telefono
 
 
-class PriorityAppointmentForm(forms.ModelForm):
+class NormalAppointmentForm(BaseAppointmentForm):
+    """
+    Formulario para agendar una cita normal.
+    Solo requiere datos básicos del cliente y la fecha deseada.
+    El sistema identificará automáticamente la propiedad de interés.
+    """
+    
+    tipo_cita = 'normal'
+
+
+class PriorityAppointmentForm(BaseAppointmentForm):
     """
     Formulario para agendar una cita prioritaria.
     Requiere datos adicionales sobre ingresos y tipo de crédito
     para ofrecer asesoramiento crediticio especializado.
     """
     
-    class Meta:
-        model = Appointment
-        fields = [
-            'nombre_cliente',
-            'email_cliente',
-            'telefono_cliente',
-            'fecha_cita',
+    tipo_cita = 'prioritaria'
+    
+    # Campo declarado una sola vez con las opciones estáticas del modelo. Como
+    # en el modelo (null=True, blank=True), es opcional en el servidor y un
+    # valor vacío se guarda como None
+    tipo_credito = forms.TypedChoiceField(
+        choices=[('', 'Selecciona una opción')] + Appointment.CREDIT_TYPES,
+        coerce=str,
+        required=False,
+        empty_value=None,
+        widget=forms.Select(attrs={
+            'class': 'form-control',
+            'required': True
+        }),
+        label='Tipo de Crédito'
+    )
+    
+    class Meta(BaseAppointmentForm.Meta):
+        fields = BaseAppointmentForm.Meta.fields + [
             'ingresos_mensuales',
             'tipo_credito',
         ]
         widgets = {
-            'nombre_cliente': forms.TextInput(attrs={
-                'class': 'form-control',
-                'placeholder': 'Tu nombre completo',
-                'required': True
-            }),
-            'email_cliente': forms.EmailInput(attrs={
-                'class': 'form-control',
-                'placeholder': 'tu_email@ejemplo.com',
-                'required': True
-            }),
-            'telefono_cliente': forms.TextInput(attrs={
-                'class': 'form-control',
-                'placeholder': 'Ej: 2221234567',
-                'required': True
-            }),
-            'fecha_cita': forms.DateInput(attrs={
-                'class': 'form-control',
-                'type': 'date',
-                'required': True
-            }),
+            **BaseAppointmentForm.Meta.widgets,
             'ingresos_mensuales': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Ej: 15000',
                 'step': '0.01',
                 'required': True
             }),
-            'tipo_credito': forms.Select(attrs={
-                'class': 'form-control',
-                'required': True
-            }),
         }
         labels = {
-            'nombre_cliente': 'Nombre Completo',
-            'email_cliente': 'Correo Electrónico',
-            'telefono_cliente': 'Teléfono',
-            'fecha_cita': 'Fecha de la Cita',
+            **BaseAppointmentForm.Meta.labels,
             'ingresos_mensuales': 'Ingresos Mensuales (MXN)',
-            'tipo_credito': 'Tipo de Crédito',
         }
     
-    def __init__(self, *args, **kwargs):
-        """
-        Inicializa el formulario y establece el tipo de cita como 'prioritaria'.
-        """
-        super().__init__(*args, **kwargs)
-        if self.instance:
-            self.instance.tipo_cita = 'prioritaria'
-    
-    def clean_telefono_cliente(self):
-        """
-        Valida que el teléfono contenga solo números y tenga al menos 10 dígitos.
-        """
-        telefono = self.cleaned_data.get('telefono_cliente')
-        telefono_limpio = telefono.replace(' ', '').replace('-', '')
-        
-        if not telefono_limpio.isdigit():
-            raise forms.ValidationError('El teléfono debe contener solo números.')
-        
-        if len(telefono_limpio) < 10:
-            raise forms.ValidationError('El teléfono debe tener al menos 10 dígitos.')
-        
-        return telefono
-    
     def clean_ingresos_mensuales(self):
         """
         Valida que los ingresos mensuales sean mayores a cero.
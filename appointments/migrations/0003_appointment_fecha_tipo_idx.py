@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-14 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_availableday'),
+        ('properties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['fecha_cita', 'tipo_cita'], name='appt_fecha_tipo_idx'),
+        ),
+    ]
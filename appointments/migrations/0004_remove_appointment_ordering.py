@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-14 12:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_appointment_fecha_tipo_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='appointment',
+            options={'verbose_name': 'Cita', 'verbose_name_plural': 'Citas'},
+        ),
+    ]
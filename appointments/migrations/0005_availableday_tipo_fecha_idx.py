@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_remove_appointment_ordering'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='availableday',
+            name='appointment_fecha_d_47f778_idx',
+        ),
+        migrations.AddIndex(
+            model_name='availableday',
+            index=models.Index(fields=['tipo_cita', 'fecha_disponible'], name='avail_tipo_fecha_idx'),
+        ),
+    ]
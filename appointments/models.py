@@ -1,7 +1,41 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from properties.models import Property
 
+
+class AvailableDayQuerySet(models.QuerySet):
+    """
+    QuerySet de días disponibles con anotaciones de ocupación.
+    """
+    
+    def con_citas_count(self):
+        """
+        Anota cada día con el número de citas agendadas (`citas_count`).
+        
+        El conteo se resuelve con una subconsulta en la misma consulta, en
+        lugar de un COUNT por cada día.
+        
+        Returns:
+            QuerySet: Días anotados con `citas_count`
+        """
+        citas = Appointment.objects.filter(
+            fecha_cita__date=OuterRef('fecha_disponible'),
+            tipo_cita=OuterRef('tipo_cita')
+        ).order_by().values('tipo_cita').annotate(total=Count('*')).values('total')
+        return self.annotate(citas_count=Coalesce(Subquery(citas), 0))
+    
+    def con_capacidad(self):
+        """
+        Filtra los días que todavía tienen espacio para más citas.
+        
+        Returns:
+            QuerySet: Días anotados con `citas_count` y con capacidad disponible
+        """
+        return self.con_citas_count().filter(citas_count__lt=F('capacidad_maxima'))
+
+
 class AvailableDay(models.Model):
     """
     Modelo para gestionar los días disponibles para agendar citas.
@@ -14,6 +48,9 @@ class AvailableDay(models.Model):
         ('prioritaria', 'Cita Prioritaria'),
     ]
     
+    # Etiquetas precalculadas para no reconstruir el diccionario en cada __str__
+    _TIPO_CITA_DISPLAY = dict(APPOINTMENT_TYPE_CHOICES)
+    
     # Fecha del día disponible
     fecha_disponible = models.DateField(
         verbose_name="Fecha Disponible",
@@ -46,19 +83,29 @@ class AvailableDay(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = AvailableDayQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Día Disponible"
         verbose_name_plural = "Días Disponibles"
         ordering = ['fecha_disponible', 'tipo_cita']
         # Evitar duplicados: una fecha no puede tener el mismo tipo dos veces
         unique_together = [['fecha_disponible', 'tipo_cita']]
+        # El índice único de unique_together ya cubre (fecha_disponible, tipo_cita);
+        # este otro orden sirve a las consultas por tipo en un rango de fechas
         indexes = [
-            models.Index(fields=['fecha_disponible', 'tipo_cita']),
+            models.Index(fields=['tipo_cita', 'fecha_disponible'], name='avail_tipo_fecha_idx'),
         ]
     
     def __str__(self):
         return f"{self.fecha_disponible.strftime('%d/%m/%Y')} - {self.get_tipo_cita_display()}"
     
+    def get_tipo_cita_display(self):
+        """
+        Retorna la etiqueta legible del tipo de cita.
+        """
+        return self._TIPO_CITA_DISPLAY.get(self.tipo_cita, self.tipo_cita)
+    
     def obtener_citas_agendadas(self):
         """
         Retorna las citas ya agendadas para esta fecha y tipo.
@@ -71,6 +118,19 @@ class AvailableDay(models.Model):
             tipo_cita=self.tipo_cita
         )
     
+    def _citas_count(self):
+        """
+        Número de citas agendadas, calculado una sola vez por instancia.
+        
+        Si el queryset ya anotó `citas_count` (por ejemplo en el admin) se usa
+        ese valor; de lo contrario se ejecuta el COUNT y se guarda en la instancia.
+        """
+        citas_count = self.__dict__.get('citas_count')
+        if citas_count is None:
+            citas_count = self.obtener_citas_agendadas().count()
+            self.citas_count = citas_count
+        return citas_count
+    
     def obtener_capacidad_disponible(self):
         """
         Calcula cuántas citas más se pueden agendar en este día.
@@ -78,8 +138,7 @@ class AvailableDay(models.Model):
         Returns:
             int: Número de espacios disponibles
         """
-        citas_agendadas = self.obtener_citas_agendadas().count()
-        return max(0, self.capacidad_maxima - citas_agendadas)
+        return max(0, self.capacidad_maxima - self._citas_count())
     
     def esta_disponible(self):
         """
@@ -116,6 +175,9 @@ class Appointment(models.Model):
         ('contado', 'Contado'),
     ]
     
+    # Etiquetas precalculadas del tipo de cita
+    _TIPO_CITA_DISPLAY = dict(APPOINTMENT_TYPES)
+    
     # Relación con la propiedad
     property = models.ForeignKey(
         Property,
@@ -167,7 +229,15 @@ class Appointment(models.Model):
     class Meta:
         verbose_name = "Cita"
         verbose_name_plural = "Citas"
-        ordering = ['fecha_cita']
+        indexes = [
+            models.Index(fields=['fecha_cita', 'tipo_cita'], name='appt_fecha_tipo_idx'),
+        ]
     
     def __str__(self):
         return f"Cita de {self.nombre_cliente} - {self.property.nombre} - {self.fecha_cita}"
+    
+    def get_tipo_cita_display(self):
+        """
+        Retorna la etiqueta legible del tipo de cita.
+        """
+        return self._TIPO_CITA_DISPLAY.get(self.tipo_cita, self.tipo_cita)
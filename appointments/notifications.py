@@ -0,0 +1,157 @@
+"""
+Notificaciones de la app de citas.
+
+Contiene el envío del email al administrador y la creación de los eventos en
+Google Calendar para las citas nuevas. Las tareas de appointments/tasks.py
+llaman a estas funciones en segundo plano.
+"""
+
+import logging
+import smtplib
+import threading
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+
+from integrations.services.google_calendar_service import crear_eventos_en_google_calendar_batch
+from .reintentos import es_error_smtp_transitorio, reintentar_con_backoff
+
+
+logger = logging.getLogger(__name__)
+
+# Remitente y destinatario de las notificaciones, resueltos una sola vez
+_FROM_EMAIL = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@habitatum.com')
+_ADMIN_EMAIL = getattr(settings, 'ADMIN_EMAIL', 'admin@habitatum.com')
+
+# Templates de email compilados (ver obtener_template_email)
+_templates_email = {}
+
+# Conexión SMTP compartida por los hilos del pool (ver enviar_mensajes_email)
+_conexion_email = None
+_lock_conexion_email = threading.Lock()
+
+
+def enviar_mensajes_email(mensajes):
+    """
+    Envía mensajes de email reutilizando una única conexión SMTP.
+    
+    La conexión se abre la primera vez y se mantiene abierta entre
+    notificaciones, evitando repetir el handshake TLS y la autenticación en
+    cada envío. Si el servidor cerró la conexión por inactividad, se abre una
+    nueva y se reintenta una vez; ante cualquier otro error SMTP la conexión
+    se descarta y el error se propaga.
+    
+    Parámetros:
+        mensajes: Lista de EmailMessage a enviar
+        
+    Retorna:
+        int: Número de mensajes enviados
+    """
+    global _conexion_email
+    
+    with _lock_conexion_email:
+        if _conexion_email is None:
+            _conexion_email = get_connection()
+        
+        try:
+            _conexion_email.open()
+            return _conexion_email.send_messages(mensajes)
+        except smtplib.SMTPServerDisconnected:
+            _conexion_email.close()
+            _conexion_email.open()
+            return _conexion_email.send_messages(mensajes)
+        except (smtplib.SMTPException, OSError):
+            _conexion_email.close()
+            _conexion_email = None
+            raise
+
+
+def obtener_template_email(nombre):
+    """
+    Obtiene un template de email compilado.
+    
+    Cada template se carga y compila una sola vez por proceso; las siguientes
+    notificaciones reutilizan el mismo objeto en lugar de volver a pasar
+    por el loader.
+    
+    Parámetros:
+        nombre: Ruta del template (por ejemplo 'email/new_appointment_email.html')
+        
+    Retorna:
+        Template: Template compilado
+    """
+    template = _templates_email.get(nombre)
+    if template is None:
+        template = _templates_email[nombre] = get_template(nombre)
+    return template
+
+
+def enviar_notificacion_nueva_cita(cita):
+    """
+    Envía un email de notificación al administrador cuando se crea una nueva cita.
+    
+    Esta función:
+    1. Renderiza los templates HTML y de texto plano con los datos de la cita
+    2. Envía el email al administrador configurado en settings
+    3. Maneja errores de envío de forma segura
+    
+    Parámetros:
+        cita: Objeto Appointment con los datos de la cita, con la propiedad
+              ya cargada (select_related('property'))
+        
+    Retorna:
+        bool: True si se envió correctamente, False en caso contrario
+    """
+    try:
+        # Preparar asunto del email
+        tipo_cita_texto = "Prioritaria" if cita.tipo_cita == 'prioritaria' else "Normal"
+        asunto = f"🏠 Nueva Cita {tipo_cita_texto} - {cita.nombre_cliente}"
+        
+        # Renderizar las versiones HTML y de texto plano
+        contexto_email = {
+            'cita': cita,
+            'propiedad': cita.property,
+            'tipo_cita_texto': tipo_cita_texto,
+        }
+        
+        mensaje_html = obtener_template_email('email/new_appointment_email.html').render(contexto_email)
+        mensaje_texto = obtener_template_email('email/new_appointment_email.txt').render(contexto_email)
+        
+        # Enviar email por la conexión SMTP compartida
+        mensaje = EmailMultiAlternatives(
+            subject=asunto,
+            body=mensaje_texto,
+            from_email=_FROM_EMAIL,
+            to=[_ADMIN_EMAIL],
+        )
+        mensaje.attach_alternative(mensaje_html, 'text/html')
+        reintentar_con_backoff(enviar_mensajes_email, [mensaje], es_transitorio=es_error_smtp_transitorio)
+        
+        logger.info("✅ Email de notificación enviado correctamente")
+        return True
+        
+    except Exception as error:
+        logger.error("❌ Error al enviar email de notificación: %s", error)
+        return False
+
+
+def crear_eventos_google_calendar(citas):
+    """
+    Crea en Google Calendar los eventos de varias citas en una sola petición batch.
+    
+    Parámetros:
+        citas: Lista de objetos Appointment con la propiedad ya cargada
+        
+    Retorna:
+        dict: {id de la cita: ID del evento creado}; vacío si falla
+    """
+    try:
+        eventos = crear_eventos_en_google_calendar_batch(citas)
+        if len(eventos) < len(citas):
+            logger.warning("⚠️ Se crearon %s de %s eventos en Google Calendar", len(eventos), len(citas))
+        return eventos
+        
+    except Exception as error:
+        logger.error("❌ Error al crear eventos en Google Calendar: %s", error)
+        return {}
@@ -0,0 +1,99 @@
+"""
+Reintentos con backoff exponencial para llamadas a servicios externos.
+
+El envío de emails (SMTP) y la creación de eventos en Google Calendar pueden
+fallar por errores transitorios (límite de peticiones, servidor saturado,
+conexión cerrada). Estos fallos se reintentan esperando cada vez más, con
+jitter para que varios hilos no reintenten al mismo tiempo; los errores
+permanentes (credenciales inválidas, petición mal formada) fallan de
+inmediato.
+"""
+
+import logging
+import random
+import smtplib
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto del backoff
+INTENTOS_MAXIMOS = 5
+ESPERA_INICIAL = 1  # segundos
+ESPERA_MAXIMA = 60  # segundos
+
+
+def calcular_espera_backoff(intento, espera_inicial=ESPERA_INICIAL, espera_maxima=ESPERA_MAXIMA, retry_after=None):
+    """
+    Calcula cuántos segundos esperar antes del siguiente intento.
+
+    Usa backoff exponencial con "full jitter": un valor aleatorio entre 0 y
+    espera_inicial * 2**intento, limitado a espera_maxima. Si el servidor
+    indicó un Retry-After, se respeta como espera mínima.
+
+    Parámetros:
+        intento: Número de intento fallido (0 para el primero)
+        espera_inicial: Segundos base del backoff
+        espera_maxima: Tope de segundos de espera
+        retry_after: Segundos indicados por el servidor (opcional)
+
+    Retorna:
+        float: Segundos a esperar
+    """
+    espera = random.uniform(0, min(espera_maxima, espera_inicial * (2 ** intento)))
+    if retry_after is not None:
+        espera = max(espera, min(retry_after, espera_maxima))
+    return espera
+
+
+def es_error_smtp_transitorio(error):
+    """
+    Indica si un error de SMTP vale la pena reintentarlo.
+
+    Son transitorios la conexión cerrada o rechazada, los timeouts de red y
+    las respuestas 4xx del servidor (por ejemplo 421 "Too many connections").
+    Las respuestas 5xx, como credenciales inválidas, son permanentes.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+def reintentar_con_backoff(funcion, *args, es_transitorio, intentos=INTENTOS_MAXIMOS,
+                           obtener_retry_after=None, espera_maxima=ESPERA_MAXIMA, **kwargs):
+    """
+    Ejecuta una función reintentándola ante errores transitorios.
+
+    Parámetros:
+        funcion: Función a ejecutar
+        *args, **kwargs: Argumentos para la función
+        es_transitorio: Función que recibe la excepción y decide si reintentar
+        intentos: Número máximo de intentos
+        obtener_retry_after: Función opcional que recibe la excepción y
+            devuelve los segundos de Retry-After indicados por el servidor
+        espera_maxima: Tope de segundos de espera entre intentos, también
+            para el Retry-After
+
+    Retorna:
+        El valor que devuelva la función
+
+    Excepciones:
+        Relanza el último error si no es transitorio o se agotan los intentos
+    """
+    for intento in range(intentos):
+        try:
+            return funcion(*args, **kwargs)
+        except Exception as error:
+            if intento == intentos - 1 or not es_transitorio(error):
+                raise
+            retry_after = obtener_retry_after(error) if obtener_retry_after else None
+            espera = calcular_espera_backoff(intento, espera_maxima=espera_maxima, retry_after=retry_after)
+            logger.warning(
+                "Error transitorio en %s (intento %s de %s), reintentando en %.1f s: %s",
+                funcion.__name__, intento + 1, intentos, espera, error
+            )
+            time.sleep(espera)
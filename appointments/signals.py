@@ -0,0 +1,113 @@
+"""
+Señales de la app de citas.
+
+Mantienen coherentes los valores cacheados que usan las vistas de citas
+cuando cambian los modelos de los que dependen. La invalidación se hace al
+confirmar la transacción: si se hiciera antes, una petición intermedia
+volvería a guardar en cache los datos anteriores al cambio.
+
+Si un día disponible o una cita cambia de fecha o de tipo, el cache de la
+fecha y el tipo anteriores también queda desactualizado: pre_save lee esos
+valores de la base de datos y post_save invalida ambos.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from properties.models import Property
+from .models import Appointment, AvailableDay
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidar_cache_propiedad(sender, instance, **kwargs):
+    """
+    Elimina del cache la propiedad visible cuando se modifica o elimina.
+    """
+    from .views import clave_cache_propiedad
+    clave = clave_cache_propiedad(instance.pk)
+    transaction.on_commit(lambda: cache.delete(clave))
+
+
+def leer_fecha_tipo_anteriores(instance, campo_fecha, update_fields=None):
+    """
+    Lee de la base de datos la fecha y el tipo de cita que tiene un registro antes de guardarlo.
+    
+    Args:
+        instance: AvailableDay o Appointment que se va a guardar
+        campo_fecha: str - 'fecha_disponible' o 'fecha_cita'
+        update_fields: campos que se guardan, si se indicaron en save()
+        
+    Returns:
+        tuple: (fecha, tipo_cita) guardados, o None si el registro es nuevo o
+        el guardado no modifica esos campos
+    """
+    if instance._state.adding or instance.pk is None:
+        return None
+    if update_fields is not None and not {campo_fecha, 'tipo_cita'} & set(update_fields):
+        return None
+    return type(instance).objects.filter(pk=instance.pk).values_list(campo_fecha, 'tipo_cita').first()
+
+
+def programar_invalidacion_fechas(valores):
+    """
+    Invalida, al confirmar la transacción, el cache de cada par (fecha, tipo_cita).
+    
+    Args:
+        valores: iterable de tuplas (date, tipo_cita); los repetidos se ignoran
+    """
+    from .views import invalidar_cache_fechas_disponibles
+    valores = set(valores)
+    
+    def invalidar():
+        for fecha, tipo_cita in valores:
+            invalidar_cache_fechas_disponibles([fecha], tipo_cita)
+    transaction.on_commit(invalidar)
+
+
+@receiver(pre_save, sender=AvailableDay)
+def guardar_fecha_anterior_dia(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda la fecha y el tipo que tenía el día antes de modificarlo.
+    """
+    instance._fecha_tipo_anteriores = leer_fecha_tipo_anteriores(instance, 'fecha_disponible', update_fields)
+
+
+@receiver(pre_save, sender=Appointment)
+def guardar_fecha_anterior_cita(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda el día y el tipo que tenía la cita antes de modificarla.
+    """
+    anteriores = leer_fecha_tipo_anteriores(instance, 'fecha_cita', update_fields)
+    if anteriores is not None:
+        anteriores = (timezone.localtime(anteriores[0]).date(), anteriores[1])
+    instance._fecha_tipo_anteriores = anteriores
+
+
+@receiver([post_save, post_delete], sender=AvailableDay)
+def invalidar_cache_fechas_dia(sender, instance, **kwargs):
+    """
+    Elimina del cache las fechas disponibles del mes y la ocupación del día
+    modificado, y las de su fecha y tipo anteriores si cambiaron.
+    """
+    valores = [(instance.fecha_disponible, instance.tipo_cita)]
+    anteriores = instance.__dict__.pop('_fecha_tipo_anteriores', None)
+    if anteriores is not None:
+        valores.append(anteriores)
+    programar_invalidacion_fechas(valores)
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def invalidar_cache_fechas_cita(sender, instance, **kwargs):
+    """
+    Elimina del cache las fechas disponibles del mes de la cita, ya que
+    una cita nueva o cancelada cambia la capacidad del día. Si la cita se
+    movió de día o de tipo, también las del día y tipo anteriores.
+    """
+    valores = [(timezone.localtime(instance.fecha_cita).date(), instance.tipo_cita)]
+    anteriores = instance.__dict__.pop('_fecha_tipo_anteriores', None)
+    if anteriores is not None:
+        valores.append(anteriores)
+    programar_invalidacion_fechas(valores)
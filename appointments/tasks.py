@@ -0,0 +1,160 @@
+"""
+Tareas en segundo plano de la app de citas.
+
+Las notificaciones de una cita nueva (email al administrador y evento en
+Google Calendar) se ejecutan en un pool de hilos para que la respuesta HTTP
+no espere al servidor SMTP ni a la API de Google. Cada tarea recibe solo el
+ID de la cita y la vuelve a cargar desde la base de datos.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+from .models import Appointment
+from .notifications import enviar_notificacion_nueva_cita, crear_eventos_google_calendar
+
+
+logger = logging.getLogger(__name__)
+
+# Pool de hilos para enviar notificaciones fuera del ciclo de la petición
+_executor_notificaciones = ThreadPoolExecutor(max_workers=2, thread_name_prefix='notificaciones')
+
+# Hilo propio para los lotes de Google Calendar: sus reintentos esperan hasta
+# ESPERA_MAXIMA segundos (appointments/reintentos.py) y no deben ocupar los
+# hilos que envían los emails de confirmación
+_executor_calendario = ThreadPoolExecutor(max_workers=1, thread_name_prefix='calendario')
+
+# Lote de citas pendientes de crear en Google Calendar (ver crear_evento_calendario)
+TAMANO_LOTE_CALENDARIO = 25
+ESPERA_LOTE_CALENDARIO = 2  # segundos
+_citas_pendientes_calendario = []
+_lock_calendario = threading.Lock()
+_vaciado_programado = False
+
+
+def encolar_tarea(tarea, *args):
+    """
+    Encola una tarea para ejecutarse cuando la transacción actual se confirme.
+    
+    Con transaction.on_commit la tarea solo se ejecuta si la cita realmente
+    se guardó, y nunca antes de que sea visible para el hilo que la procesa.
+    
+    Parámetros:
+        tarea: Función a ejecutar en segundo plano
+        *args: Argumentos para la tarea
+    """
+    transaction.on_commit(
+        lambda: _executor_notificaciones.submit(_ejecutar_tarea, tarea, *args)
+    )
+
+
+def _ejecutar_tarea(tarea, *args):
+    """
+    Ejecuta una tarea en el hilo del pool con una conexión a la base de datos vigente.
+    
+    Como Django al inicio y al final de cada petición, se descartan antes y
+    después de la tarea las conexiones que superaron CONN_MAX_AGE o quedaron
+    inservibles; si no, el hilo podría empezar con una conexión caducada.
+    """
+    close_old_connections()
+    try:
+        tarea(*args)
+    finally:
+        close_old_connections()
+
+
+def citas_con_propiedad():
+    """
+    QuerySet de citas con la propiedad unida para las notificaciones.
+    
+    La descripción de la propiedad (un TextField potencialmente largo) no
+    aparece en el email ni en el evento de calendario, así que no se lee.
+    """
+    return Appointment.objects.select_related('property').defer('property__descripcion')
+
+
+def cargar_cita(cita_id):
+    """
+    Carga una cita junto con su propiedad.
+    
+    El email y el evento de calendario leen cita.property.nombre y
+    cita.property.ubicacion; el select_related los trae en la misma consulta.
+    No usar refresh_from_db() sobre la cita cargada: descartaría la
+    propiedad ya unida y volvería a consultarla.
+    
+    Retorna:
+        Appointment o None si la cita ya no existe
+    """
+    return citas_con_propiedad().filter(pk=cita_id).first()
+
+
+def enviar_notificacion_cita(cita_id):
+    """
+    Tarea: envía el email de notificación al administrador.
+    
+    Parámetros:
+        cita_id: ID de la cita recién creada
+    """
+    cita = cargar_cita(cita_id)
+    if cita is None:
+        return
+    
+    try:
+        enviar_notificacion_nueva_cita(cita)
+    except Exception as e:
+        logger.error("Error al enviar email de notificación: %s", e)
+
+
+def crear_evento_calendario(cita_id):
+    """
+    Tarea: agrega la cita al lote de eventos pendientes de Google Calendar.
+    
+    Las citas se acumulan hasta ESPERA_LOTE_CALENDARIO segundos (o hasta
+    TAMANO_LOTE_CALENDARIO citas) y se crean todas con una sola petición
+    batch, en lugar de una petición HTTPS por cita. El lote se procesa en el
+    hilo de calendario, no en el de notificaciones.
+    
+    Parámetros:
+        cita_id: ID de la cita recién creada
+    """
+    global _vaciado_programado
+    
+    with _lock_calendario:
+        _citas_pendientes_calendario.append(cita_id)
+        lote_completo = len(_citas_pendientes_calendario) >= TAMANO_LOTE_CALENDARIO
+        programar = not lote_completo and not _vaciado_programado
+        if programar:
+            _vaciado_programado = True
+    
+    if lote_completo:
+        _executor_calendario.submit(_ejecutar_tarea, vaciar_lote_calendario)
+    elif programar:
+        temporizador = threading.Timer(
+            ESPERA_LOTE_CALENDARIO,
+            lambda: _executor_calendario.submit(_ejecutar_tarea, vaciar_lote_calendario)
+        )
+        temporizador.daemon = True
+        temporizador.start()
+
+
+def vaciar_lote_calendario():
+    """
+    Crea en Google Calendar los eventos de todas las citas pendientes del lote.
+    """
+    global _vaciado_programado
+    
+    with _lock_calendario:
+        cita_ids = list(_citas_pendientes_calendario)
+        _citas_pendientes_calendario.clear()
+        _vaciado_programado = False
+    
+    if not cita_ids:
+        return
+    
+    # Una sola consulta para todas las citas del lote
+    citas = list(citas_con_propiedad().filter(pk__in=cita_ids))
+    if citas:
+        crear_eventos_google_calendar(citas)
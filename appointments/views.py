@@ -1,13 +1,119 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.utils import timezone
 from datetime import date
 
 from .models import Appointment, AvailableDay
 from .forms import NormalAppointmentForm, PriorityAppointmentForm
+from .tasks import encolar_tarea, enviar_notificacion_cita, crear_evento_calendario
 from properties.models import Property
 
 
+# Tiempo (segundos) que se conserva en cache una propiedad visible. Las señales
+# de Property invalidan la entrada al editarla, así que el TTL solo acota
+# cambios hechos sin señales (por ejemplo queryset.update()).
+TIEMPO_CACHE_PROPIEDAD = 120
+
+# Tiempo (segundos) que se conservan en cache las fechas disponibles de un mes
+TIEMPO_CACHE_FECHAS = 300
+
+# Tiempo (segundos) que se conserva en cache la ocupación de un día. Es corto
+# porque solo sirve para validar el formulario: guardar_cita_con_capacidad
+# vuelve a comprobar la capacidad con la fila bloqueada.
+TIEMPO_CACHE_DIA = 30
+
+
+def clave_cache_propiedad(property_id):
+    """
+    Construye la clave de cache para una propiedad visible.
+    """
+    return f'prop-visible:{property_id}'
+
+
+def obtener_propiedad_visible(property_id):
+    """
+    Obtiene una propiedad visible usando un cache de corta duración.
+    
+    La vista de agendar se consulta dos veces por reserva (GET del formulario
+    y POST del envío); el cache evita repetir la misma consulta. Las señales
+    de Property invalidan la entrada al modificarse la propiedad.
+    
+    Args:
+        property_id: int - ID de la propiedad
+        
+    Returns:
+        Property: La propiedad visible
+        
+    Raises:
+        Http404: Si la propiedad no existe o no está visible
+    """
+    clave = clave_cache_propiedad(property_id)
+    propiedad = cache.get(clave)
+    
+    if propiedad is None:
+        # La descripción no se muestra en el formulario de citas
+        propiedad = Property.objects.defer('descripcion').filter(
+            pk=property_id, is_visible=True
+        ).first()
+        if propiedad is None:
+            raise Http404("No existe una propiedad visible con ese ID.")
+        cache.set(clave, propiedad, TIEMPO_CACHE_PROPIEDAD)
+    
+    return propiedad
+
+
+def clave_cache_fechas_disponibles(anio, mes, tipo_cita):
+    """
+    Construye la clave de cache para las fechas disponibles de un mes.
+    
+    Incluye el día actual porque el resultado excluye los días pasados.
+    """
+    return f'fechas-disp:{tipo_cita}:{anio}:{mes}:{timezone.now().date().isoformat()}'
+
+
+def clave_cache_dia_disponible(fecha, tipo_cita):
+    """
+    Construye la clave de cache para la ocupación de un día disponible.
+    """
+    return f'dia-disp:{tipo_cita}:{fecha.isoformat()}'
+
+
+def invalidar_cache_fechas_disponibles(fechas, tipo_cita):
+    """
+    Elimina del cache las fechas disponibles de los meses afectados y la
+    ocupación de cada día indicado.
+    
+    Args:
+        fechas: iterable de date - días que cambiaron
+        tipo_cita: str - 'normal' o 'prioritaria'
+    """
+    fechas = list(fechas)
+    claves = {clave_cache_fechas_disponibles(fecha.year, fecha.month, tipo_cita) for fecha in fechas}
+    claves.update(clave_cache_dia_disponible(fecha, tipo_cita) for fecha in fechas)
+    if claves:
+        cache.delete_many(list(claves))
+
+
+def es_peticion_ajax(request):
+    """
+    Indica si la petición fue enviada por JavaScript (XMLHttpRequest/fetch).
+    """
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def respuesta_errores_json(form):
+    """
+    Construye una respuesta 400 con los errores de validación del formulario.
+    
+    Returns:
+        JsonResponse: {'errors': {campo: [{'message': ..., 'code': ...}]}}
+    """
+    return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+
+
 def verificar_disponibilidad_dia(fecha_cita, tipo_cita):
     """
     Verifica si un día específico está disponible para agendar citas del tipo especificado.
@@ -29,23 +135,80 @@ def verificar_disponibilidad_dia(fecha_cita, tipo_cita):
     if fecha < timezone.now().date():
         return False, "No puedes agendar citas en días pasados."
     
-    # Buscar si el día está configurado como disponible
-    try:
-        dia_disponible = AvailableDay.objects.get(
+    # Capacidad y citas del día; el cache evita repetir la consulta en cada envío
+    ocupacion = cache.get_or_set(
+        clave_cache_dia_disponible(fecha, tipo_cita),
+        lambda: obtener_ocupacion_dia(fecha, tipo_cita),
+        TIEMPO_CACHE_DIA
+    )
+    
+    if ocupacion is None:
+        tipo_texto = "citas normales" if tipo_cita == 'normal' else "citas prioritarias"
+        return False, f"Este día no está disponible para {tipo_texto}. Por favor selecciona otro día del calendario."
+    
+    # Verificar si todavía hay capacidad
+    capacidad_maxima, citas_count = ocupacion
+    if citas_count >= capacidad_maxima:
+        return False, f"Este día ya tiene {citas_count} citas agendadas y ha alcanzado su capacidad máxima de {capacidad_maxima}. Por favor selecciona otro día."
+    
+    return True, "Día disponible"
+
+
+def obtener_ocupacion_dia(fecha, tipo_cita):
+    """
+    Consulta la capacidad y el número de citas de un día disponible.
+    
+    Args:
+        fecha: date - día a consultar
+        tipo_cita: str - 'normal' o 'prioritaria'
+        
+    Returns:
+        tuple: (capacidad_maxima, citas_count), o None si el día no está configurado
+    """
+    # El número de citas llega anotado en la misma consulta
+    return AvailableDay.objects.filter(
+        fecha_disponible=fecha,
+        tipo_cita=tipo_cita
+    ).con_citas_count().values_list('capacidad_maxima', 'citas_count').first()
+
+
+def guardar_cita_con_capacidad(cita):
+    """
+    Guarda una cita verificando la capacidad del día con el registro bloqueado.
+    
+    Dentro de una transacción bloquea la fila de AvailableDay con
+    select_for_update, de modo que dos reservas simultáneas no puedan pasar
+    ambas la verificación de capacidad y sobrepasar el máximo del día.
+    
+    Args:
+        cita: Appointment sin guardar, con fecha_cita y tipo_cita asignados
+        
+    Returns:
+        tuple: (bool, str) - (guardada, mensaje_error)
+    """
+    fecha = timezone.localtime(cita.fecha_cita).date()
+    
+    with transaction.atomic():
+        dia_disponible = AvailableDay.objects.select_for_update().filter(
             fecha_disponible=fecha,
-            tipo_cita=tipo_cita
-        )
+            tipo_cita=cita.tipo_cita
+        ).first()
         
-        # Verificar si todavía hay capacidad
-        if not dia_disponible.esta_disponible():
-            citas_count = dia_disponible.obtener_citas_agendadas().count()
-            return False, f"Este día ya tiene {citas_count} citas agendadas y ha alcanzado su capacidad máxima de {dia_disponible.capacidad_maxima}. Por favor selecciona otro día."
+        if dia_disponible is None:
+            tipo_texto = "citas normales" if cita.tipo_cita == 'normal' else "citas prioritarias"
+            return False, f"Este día no está disponible para {tipo_texto}. Por favor selecciona otro día del calendario."
         
-        return True, "Día disponible"
+        # El COUNT se hace después de obtener el bloqueo y no anotado en la
+        # misma consulta: en PostgreSQL una subconsulta del SELECT usa la
+        # instantánea previa a la espera del bloqueo y no vería la cita que
+        # acaba de confirmar la otra transacción.
+        if not dia_disponible.esta_disponible():
+            return False, f"Este día ya tiene {dia_disponible._citas_count()} citas agendadas y ha alcanzado su capacidad máxima de {dia_disponible.capacidad_maxima}. Por favor selecciona otro día."
         
-    except AvailableDay.DoesNotExist:
-        tipo_texto = "citas normales" if tipo_cita == 'normal' else "citas prioritarias"
-        return False, f"Este día no está disponible para {tipo_texto}. Por favor selecciona otro día del calendario."
+        cita.save()
+        programar_notificaciones_cita(cita)
+    
+    return True, ""
 
 
 def obtener_fechas_disponibles_mes(anio, mes, tipo_cita):
@@ -60,20 +223,20 @@ def obtener_fechas_disponibles_mes(anio, mes, tipo_cita):
     Returns:
         list: Lista de fechas disponibles (date objects)
     """
-    dias_disponibles = AvailableDay.objects.filter(
-        fecha_disponible__year=anio,
-        fecha_disponible__month=mes,
-        tipo_cita=tipo_cita,
-        fecha_disponible__gte=timezone.now().date()  # Solo días futuros
-    )
+    # Rango de fechas en lugar de __year/__month para que la consulta use el
+    # índice (tipo_cita, fecha_disponible); solo días desde hoy
+    primer_dia = date(anio, mes, 1)
+    primer_dia_siguiente = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    desde = max(primer_dia, timezone.now().date())
     
-    # Filtrar solo los que tienen capacidad
-    fechas = []
-    for dia in dias_disponibles:
-        if dia.esta_disponible():
-            fechas.append(dia.fecha_disponible)
-    
-    return fechas
+    # Una sola consulta: la ocupación de cada día se calcula en la base de datos
+    return list(
+        AvailableDay.objects.filter(
+            tipo_cita=tipo_cita,
+            fecha_disponible__gte=desde,
+            fecha_disponible__lt=primer_dia_siguiente
+        ).con_capacidad().values_list('fecha_disponible', flat=True)
+    )
 
 
 def obtener_fechas_disponibles_para_template(anio, mes, tipo_cita):
@@ -88,88 +251,85 @@ def obtener_fechas_disponibles_para_template(anio, mes, tipo_cita):
     Returns:
         dict: Diccionario con información de fechas disponibles
     """
-    fechas = obtener_fechas_disponibles_mes(anio, mes, tipo_cita)
-    
-    # Convertir a lista de strings en formato ISO para uso en JavaScript
-    fechas_iso = [fecha.isoformat() for fecha in fechas]
+    def calcular():
+        fechas = obtener_fechas_disponibles_mes(anio, mes, tipo_cita)
+        
+        # Convertir a lista de strings en formato ISO para uso en JavaScript
+        fechas_iso = [fecha.isoformat() for fecha in fechas]
+        
+        return {
+            'mes': mes,
+            'anio': anio,
+            'fechas': fechas,
+            'fechas_iso': fechas_iso,
+            'total': len(fechas)
+        }
     
-    return {
-        'mes': mes,
-        'anio': anio,
-        'fechas': fechas,
-        'fechas_iso': fechas_iso,
-        'total': len(fechas)
-    }
+    # Las señales de AvailableDay y Appointment invalidan la entrada
+    return cache.get_or_set(
+        clave_cache_fechas_disponibles(anio, mes, tipo_cita), calcular, TIEMPO_CACHE_FECHAS
+    )
 
 
-def create_normal_appointment_view(request, property_id):
+def procesar_formulario_cita(request, property_id, tipo_cita, clase_formulario, titulo, mensaje_exito):
     """
-    Vista para crear una cita normal CON VALIDACIÓN DE DISPONIBILIDAD.
+    Muestra y procesa el formulario para agendar una cita de cualquier tipo.
     
-    Ahora verifica que:
+    Verifica que:
     1. El día seleccionado esté marcado como disponible por el admin
     2. Todavía haya capacidad en ese día
     3. No sea un día del pasado
-    """
-    # Obtener la propiedad o mostrar 404
-    propiedad = get_object_or_404(Property, pk=property_id, is_visible=True)
     
+    Args:
+        request: HttpRequest
+        property_id: int - ID de la propiedad
+        tipo_cita: str - 'normal' o 'prioritaria'
+        clase_formulario: Formulario de cita a usar
+        titulo: str - inicio del título de la página (se agrega el nombre de la propiedad)
+        mensaje_exito: str - mensaje tras agendar; puede usar {propiedad}
+        
+    Returns:
+        HttpResponse
+    """
     if request.method == 'POST':
         # El usuario envió el formulario
-        form = NormalAppointmentForm(request.POST)
+        form = clase_formulario(request.POST)
         
+        # Peticiones AJAX con errores: responder sin consultar la propiedad ni renderizar
+        if not form.is_valid() and es_peticion_ajax(request):
+            return respuesta_errores_json(form)
+    
+    # Obtener la propiedad (desde cache si es posible) o mostrar 404
+    propiedad = obtener_propiedad_visible(property_id)
+    
+    if request.method == 'POST':
         if form.is_valid():
             # Obtener la fecha seleccionada
             fecha_cita = form.cleaned_data['fecha_cita']
             
             # VALIDACIÓN CRÍTICA: Verificar disponibilidad
-            disponible, mensaje_error = verificar_disponibilidad_dia(fecha_cita, 'normal')
+            disponible, mensaje_error = verificar_disponibilidad_dia(fecha_cita, tipo_cita)
             
-            if not disponible:
-                messages.error(request, mensaje_error)
-                # Recargar el formulario con el error
-                contexto = {
-                    'form': form,
-                    'propiedad': propiedad,
-                    'tipo_cita': 'normal',
-                    'titulo_pagina': f'Agendar Cita - {propiedad.nombre}',
-                    'fechas_disponibles': obtener_fechas_disponibles_para_template(timezone.now().year, timezone.now().month, 'normal')
-                }
-                return render(request, 'appointment_form.html', contexto)
+            if disponible:
+                # Si llegamos aquí, el día está disponible
+                # Crear la cita pero no guardarla todavía (commit=False)
+                cita = form.save(commit=False)
+                
+                # Asignar la propiedad y asegurar el tipo de cita
+                cita.property = propiedad
+                cita.tipo_cita = tipo_cita
+                
+                # Guardar bloqueando el día disponible para evitar sobrecupo;
+                # las notificaciones se envían al confirmar la transacción
+                disponible, mensaje_error = guardar_cita_con_capacidad(cita)
             
-            # Si llegamos aquí, el día está disponible
-            # Crear la cita pero no guardarla todavía (commit=False)
-            cita = form.save(commit=False)
+            if disponible:
+                # Mostrar mensaje de éxito y redirigir a la confirmación
+                messages.success(request, mensaje_exito.format(propiedad=propiedad.nombre))
+                return redirect('appointments:confirmation')
             
-            # Asignar la propiedad a la cita
-            cita.property = propiedad
-            
-            # Asegurarse de que el tipo de cita sea 'normal'
-            cita.tipo_cita = 'normal'
-            
-            # Ahora sí guardar en la base de datos
-            cita.save()
-            
-            # Enviar email de notificación al administrador
-            try:
-                enviar_notificacion_nueva_cita(cita)
-            except Exception as e:
-                print(f"Error al enviar email de notificación: {e}")
-            
-            # Crear evento en Google Calendar
-            try:
-                crear_evento_google_calendar(cita)
-            except Exception as e:
-                print(f"Error al crear evento en Google Calendar: {e}")
-            
-            # Mostrar mensaje de éxito
-            messages.success(
-                request,
-                f'¡Cita agendada con éxito para {propiedad.nombre}!'
-            )
-            
-            # Redirigir a página de confirmación
-            return redirect('appointments:confirmation')
+            # Recargar el formulario con el error
+            messages.error(request, mensaje_error)
         
         else:
             # El formulario tiene errores
@@ -180,122 +340,46 @@ def create_normal_appointment_view(request, property_id):
     
     else:
         # Mostrar formulario vacío (GET)
-        form = NormalAppointmentForm()
+        form = clase_formulario()
     
     # Obtener fechas disponibles para el calendario
     fechas_disponibles = obtener_fechas_disponibles_para_template(
         timezone.now().year, 
         timezone.now().month, 
-        'normal'
+        tipo_cita
     )
     
     contexto = {
         'form': form,
         'propiedad': propiedad,
-        'tipo_cita': 'normal',
-        'titulo_pagina': f'Agendar Cita - {propiedad.nombre}',
+        'tipo_cita': tipo_cita,
+        'titulo_pagina': f'{titulo} - {propiedad.nombre}',
         'fechas_disponibles': fechas_disponibles
     }
     
     return render(request, 'appointment_form.html', contexto)
 
 
+def create_normal_appointment_view(request, property_id):
+    """
+    Vista para crear una cita normal CON VALIDACIÓN DE DISPONIBILIDAD.
+    """
+    return procesar_formulario_cita(
+        request, property_id, 'normal', NormalAppointmentForm,
+        titulo='Agendar Cita',
+        mensaje_exito='¡Cita agendada con éxito para {propiedad}!'
+    )
+
+
 def create_priority_appointment_view(request, property_id):
     """
     Vista para crear una cita prioritaria CON VALIDACIÓN DE DISPONIBILIDAD.
-    
-    Ahora verifica que:
-    1. El día seleccionado esté marcado como disponible por el admin
-    2. Todavía haya capacidad en ese día
-    3. No sea un día del pasado
     """
-    # Obtener la propiedad o mostrar 404
-    propiedad = get_object_or_404(Property, pk=property_id, is_visible=True)
-    
-    if request.method == 'POST':
-        # El usuario envió el formulario
-        form = PriorityAppointmentForm(request.POST)
-        
-        if form.is_valid():
-            # Obtener la fecha seleccionada
-            fecha_cita = form.cleaned_data['fecha_cita']
-            
-            # VALIDACIÓN CRÍTICA: Verificar disponibilidad
-            disponible, mensaje_error = verificar_disponibilidad_dia(fecha_cita, 'prioritaria')
-            
-            if not disponible:
-                messages.error(request, mensaje_error)
-                # Recargar el formulario con el error
-                contexto = {
-                    'form': form,
-                    'propiedad': propiedad,
-                    'tipo_cita': 'prioritaria',
-                    'titulo_pagina': f'Agendar Cita Prioritaria - {propiedad.nombre}',
-                    'fechas_disponibles': obtener_fechas_disponibles_para_template(timezone.now().year, timezone.now().month, 'prioritaria')
-                }
-                return render(request, 'appointment_form.html', contexto)
-            
-            # Si llegamos aquí, el día está disponible
-            # Crear la cita pero no guardarla todavía
-            cita = form.save(commit=False)
-            
-            # Asignar la propiedad a la cita
-            cita.property = propiedad
-            
-            # Asegurarse de que el tipo de cita sea 'prioritaria'
-            cita.tipo_cita = 'prioritaria'
-            
-            # Guardar en la base de datos
-            cita.save()
-            
-            # Enviar email de notificación al administrador
-            try:
-                enviar_notificacion_nueva_cita(cita)
-            except Exception as e:
-                print(f"Error al enviar email de notificación: {e}")
-            
-            # Crear evento en Google Calendar
-            try:
-                crear_evento_google_calendar(cita)
-            except Exception as e:
-                print(f"Error al crear evento en Google Calendar: {e}")
-            
-            # Mostrar mensaje de éxito personalizado para cita prioritaria
-            messages.success(
-                request,
-                f'¡Cita prioritaria agendada con éxito! Nos pondremos en contacto contigo pronto para el asesoramiento crediticio.'
-            )
-            
-            # Redirigir a página de confirmación
-            return redirect('appointments:confirmation')
-        
-        else:
-            # El formulario tiene errores
-            messages.error(
-                request,
-                'Por favor corrige los errores en el formulario.'
-            )
-    
-    else:
-        # Mostrar formulario vacío (GET)
-        form = PriorityAppointmentForm()
-    
-    # Obtener fechas disponibles para el calendario
-    fechas_disponibles = obtener_fechas_disponibles_para_template(
-        timezone.now().year, 
-        timezone.now().month, 
-        'prioritaria'
+    return procesar_formulario_cita(
+        request, property_id, 'prioritaria', PriorityAppointmentForm,
+        titulo='Agendar Cita Prioritaria',
+        mensaje_exito='¡Cita prioritaria agendada con éxito! Nos pondremos en contacto contigo pronto para el asesoramiento crediticio.'
     )
-    
-    contexto = {
-        'form': form,
-        'propiedad': propiedad,
-        'tipo_cita': 'prioritaria',
-        'titulo_pagina': f'Agendar Cita Prioritaria - {propiedad.nombre}',
-        'fechas_disponibles': fechas_disponibles
-    }
-    
-    return render(request, 'appointment_form.html', contexto)
 
 
 def appointment_confirmation_view(request):
@@ -319,106 +403,17 @@ def appointment_confirmation_view(request):
 # FUNCIONES AUXILIARES
 # ========================================
 
-def enviar_notificacion_nueva_cita(cita):
+def programar_notificaciones_cita(cita):
     """
-    Envía un email de notificación al administrador cuando se crea una nueva cita.
+    Programa el envío de las notificaciones de una cita nueva en segundo plano.
     
-    Esta función:
-    1. Renderiza un template HTML con los datos de la cita
-    2. Envía el email al administrador configurado en settings
-    3. Maneja errores de envío de forma segura
+    El email y el evento de Google Calendar se encolan como tareas separadas
+    (ver appointments/tasks.py), de modo que la respuesta HTTP no espera al
+    servidor SMTP ni a la API de Google y solo se ejecutan si la cita
+    realmente se guardó.
     
     Parámetros:
-        cita: Objeto Appointment con los datos de la cita
-        
-    Retorna:
-        bool: True si se envió correctamente, False en caso contrario
-    """
-    from django.core.mail import send_mail
-    from django.template.loader import render_to_string
-    from django.conf import settings
-    
-    try:
-        # Preparar asunto del email
-        tipo_cita_texto = "Prioritaria" if cita.tipo_cita == 'prioritaria' else "Normal"
-        asunto = f"🏠 Nueva Cita {tipo_cita_texto} - {cita.nombre_cliente}"
-        
-        # Renderizar template HTML
-        contexto_email = {
-            'cita': cita,
-            'propiedad': cita.property,
-        }
-        
-        mensaje_html = render_to_string('email/new_appointment_email.html', contexto_email)
-        
-        # Crear versión de texto plano
-        mensaje_texto = f"""
-Nueva cita agendada en Habitatum
-
-Tipo: Cita {tipo_cita_texto}
-Cliente: {cita.nombre_cliente}
-Email: {cita.email_cliente}
-Teléfono: {cita.telefono_cliente}
-Fecha: {cita.fecha_cita.strftime('%d/%m/%Y a las %H:%M')} hrs
-
-Propiedad: {cita.property.nombre}
-Ubicación: {cita.property.ubicacion}
-"""
-        
-        if cita.tipo_cita == 'prioritaria':
-            mensaje_texto += f"""
-Información Financiera:
-- Ingresos mensuales: ${cita.ingresos_mensuales:,.2f} MXN
-- Tipo de crédito: {cita.get_tipo_credito_display()}
-"""
-        
-        # Enviar email
-        resultado = send_mail(
-            subject=asunto,
-            message=mensaje_texto,
-            html_message=mensaje_html,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@habitatum.com',
-            recipient_list=[settings.ADMIN_EMAIL if hasattr(settings, 'ADMIN_EMAIL') else 'admin@habitatum.com'],
-            fail_silently=False,
-        )
-        
-        print(f"✅ Email de notificación enviado correctamente")
-        return True
-        
-    except Exception as error:
-        print(f"❌ Error al enviar email de notificación: {error}")
-        return False
-
-
-def crear_evento_google_calendar(cita):
+        cita: Objeto Appointment recién guardado
     """
-    Crea un evento en Google Calendar para la cita agendada.
-    
-    Esta función:
-    1. Importa el servicio de Google Calendar
-    2. Intenta crear el evento con todos los detalles
-    3. Maneja errores de forma segura sin interrumpir el flujo
-    
-    Parámetros:
-        cita: Objeto Appointment con los datos de la cita
-        
-    Retorna:
-        str: ID del evento creado, o None si falla
-    """
-    try:
-        # Importar el servicio de Google Calendar
-        from integrations.services.google_calendar_service import crear_evento_en_google_calendar
-        
-        # Crear evento en Google Calendar
-        id_evento = crear_evento_en_google_calendar(cita)
-        
-        if id_evento:
-            print(f"✅ Evento creado en Google Calendar con ID: {id_evento}")
-            return id_evento
-        else:
-            print(f"⚠️ No se pudo crear el evento en Google Calendar (posiblemente no hay tokens configurados)")
-            return None
-            
-    except Exception as error:
-        print(f"❌ Error al crear evento en Google Calendar: {error}")
-        return None
+    encolar_tarea(enviar_notificacion_cita, cita.pk)
+    encolar_tarea(crear_evento_calendario, cita.pk)
@@ -0,0 +1,71 @@
+"""
+Carousel de propiedades destacadas de la página principal.
+
+El carousel se guarda en el cache como una lista de diccionarios con solo
+los datos que pinta la tarjeta (URL de la imagen y tipo de inmueble ya
+resueltos), así que la página principal no construye instancias de Property
+ni consulta la base de datos mientras el cache esté vigente. core/signals.py
+lo invalida al modificar una propiedad.
+"""
+
+from django.core.cache import cache
+
+from properties.miniaturas import nombre_miniatura
+from properties.models import Property
+
+
+# Número de propiedades que muestra el carousel
+TOTAL_CARRUSEL = 6
+
+# Clave y tiempo de vida del carousel en el cache
+CLAVE_CACHE_CARRUSEL = 'carrusel-destacadas:v1'
+TIEMPO_CACHE_CARRUSEL = 300  # segundos
+
+
+def construir_carrusel():
+    """
+    Consulta las propiedades visibles más recientes para el carousel.
+    
+    Returns:
+        list: Un diccionario por propiedad con id, nombre, ubicacion,
+        metros_cuadrados, precio, imagen_url y tipo_inmueble_display
+    """
+    storage = Property._meta.get_field('imagen_principal').storage
+    tipos_inmueble = dict(Property.PROPERTY_TYPES)
+    
+    propiedades = Property.objects.filter(
+        is_visible=True
+    ).order_by('-fecha_creacion').values(
+        'id', 'nombre', 'imagen_principal', 'miniatura', 'ubicacion',
+        'metros_cuadrados', 'tipo_inmueble', 'precio'
+    )[:TOTAL_CARRUSEL]
+    
+    carrusel = []
+    for propiedad in propiedades:
+        imagen = propiedad.pop('imagen_principal')
+        miniatura = propiedad.pop('miniatura')
+        tipo = propiedad.pop('tipo_inmueble')
+        # La miniatura si ya se generó para la imagen actual; si no, la original
+        if imagen and miniatura == nombre_miniatura(imagen):
+            imagen = miniatura
+        propiedad['imagen_url'] = storage.url(imagen) if imagen else ''
+        propiedad['tipo_inmueble_display'] = tipos_inmueble.get(tipo, tipo)
+        carrusel.append(propiedad)
+    return carrusel
+
+
+def obtener_carrusel():
+    """
+    Devuelve el carousel desde el cache, construyéndolo si no está.
+    """
+    return cache.get_or_set(CLAVE_CACHE_CARRUSEL, construir_carrusel, TIEMPO_CACHE_CARRUSEL)
+
+
+def invalidar_carrusel():
+    """
+    Elimina el carousel del cache para que la siguiente visita lo reconstruya.
+    
+    Las señales de Property lo llaman al guardar o eliminar una propiedad; los
+    cambios hechos con queryset.update() deben llamarlo a mano.
+    """
+    cache.delete(CLAVE_CACHE_CARRUSEL)
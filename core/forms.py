@@ -1,5 +1,9 @@
 from django import forms
 
+# Tabla de traducción para eliminar espacios y guiones del teléfono en una sola pasada
+_PHONE_STRIP = str.maketrans('', '', ' -')
+
+
 class CreditAdviceForm(forms.Form):
     """
     Formulario para solicitar asesoría crediticia desde la página de servicios.
@@ -77,7 +81,7 @@ class CreditAdviceForm(forms.Form):
         Valida que el teléfono contenga solo números y tenga al menos 10 dígitos.
         """
         telefono = self.cleaned_data.get('telefono')
-        telefono_limpio = telefono.replace(' ', '').replace('-', '')
+        telefono_limpio = telefono.translate(_PHONE_STRIP)
         
         if not telefono_limpio.isdigit():
             raise forms.ValidationError('El teléfono debe contener solo números.')
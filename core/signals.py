@@ -0,0 +1,22 @@
+"""
+Señales de la app core.
+
+Invalidan los datos cacheados de las páginas públicas cuando cambian
+los modelos que muestran, al confirmar la transacción (ver
+properties/signals.py).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from properties.models import Property
+from .carrusel import invalidar_carrusel
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidar_carrusel_destacadas(sender, instance, **kwargs):
+    """
+    Elimina del cache el carousel de la página principal al modificar una propiedad.
+    """
+    transaction.on_commit(invalidar_carrusel)
@@ -0,0 +1,56 @@
+"""
+Tareas en segundo plano de la app core.
+
+El email de solicitud de asesoría crediticia se envía en el mismo pool de
+hilos que las notificaciones de citas (ver appointments/tasks.py), para que
+la respuesta del formulario no espere al servidor SMTP.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from appointments.notifications import enviar_mensajes_email
+from appointments.tasks import encolar_tarea
+
+
+logger = logging.getLogger(__name__)
+
+# Remitente y destinatario del email de asesoría, resueltos una sola vez
+_FROM_EMAIL = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@habitatum.com')
+_ADMIN_EMAIL = getattr(settings, 'ADMIN_EMAIL', 'admin@habitatum.com')
+
+
+def programar_email_asesoria(asunto, cuerpo_mensaje):
+    """
+    Encola el envío del email de asesoría crediticia al administrador.
+    
+    Parámetros:
+        asunto: Asunto del email
+        cuerpo_mensaje: Cuerpo del email en texto plano
+    """
+    encolar_tarea(enviar_email_asesoria, asunto, cuerpo_mensaje)
+
+
+def enviar_email_asesoria(asunto, cuerpo_mensaje):
+    """
+    Tarea: envía el email de asesoría crediticia al administrador.
+    
+    Usa la misma conexión SMTP persistente que las notificaciones de citas,
+    así que no se abre una conexión nueva por cada solicitud.
+    
+    Parámetros:
+        asunto: Asunto del email
+        cuerpo_mensaje: Cuerpo del email en texto plano
+    """
+    try:
+        mensaje = EmailMessage(
+            subject=asunto,
+            body=cuerpo_mensaje,
+            from_email=_FROM_EMAIL,
+            to=[_ADMIN_EMAIL],
+        )
+        enviar_mensajes_email([mensaje])
+    except Exception:
+        logger.exception("Error al enviar email de asesoría")
@@ -12,4 +12,7 @@ urlpatterns = [
     
     # Procesar formulario de asesoría crediticia
     path('servicios/asesoria/', views.credit_advice_view, name='credit_advice'),
+    
+    # Directivas para crawlers
+    path('robots.txt', views.robots_txt_view, name='robots_txt'),
 ]
\ No newline at end of file
@@ -1,11 +1,51 @@
-from django.shortcuts import render, redirect
+from functools import lru_cache
+
+from django.http import HttpResponse, HttpResponseRedirect
+from django.shortcuts import render
+from django.urls import reverse
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
-from django.conf import settings
+from django.views.decorators.http import require_GET, require_POST
 
-from properties.models import Property
+from .carrusel import obtener_carrusel
 from .forms import CreditAdviceForm
+from .tasks import programar_email_asesoria
+
+
+# Cuerpo del email de asesoría crediticia (se completa con str.format_map)
+_CUERPO_EMAIL_ASESORIA = """Nueva solicitud de asesoría crediticia recibida:
+
+Nombre: {nombre}
+Email: {email}
+Teléfono: {telefono}
+Ingresos Mensuales: ${ingresos_mensuales} MXN
+Tipo de Crédito: {tipo_credito}
+
+Mensaje adicional:
+{mensaje}
+
+---
+Este correo fue enviado automáticamente desde el sitio web de Habitatum.
+"""
+
+# Contenido de /robots.txt: los crawlers no deben seguir el endpoint del
+# formulario (solo acepta POST) ni los paneles de administración
+_ROBOTS_TXT = """User-agent: *
+Disallow: /servicios/asesoria/
+Disallow: /panel/
+Disallow: /admin/
+"""
+
+
+@lru_cache(maxsize=None)
+def _url_servicios():
+    """
+    URL de la página de servicios, resuelta una sola vez.
+    
+    La ruta no cambia mientras corre el proceso, así que no hace falta
+    recorrer el resolver de URLs en cada POST del formulario de asesoría.
+    """
+    return reverse('core:services')
 
 
 def home_view(request):
@@ -14,10 +54,9 @@ def home_view(request):
     Muestra un carousel con las propiedades destacadas (visibles).
     Se muestran las 6 propiedades más recientes.
     """
-    # Obtener las propiedades visibles, ordenadas por fecha de creación (más recientes primero)
-    propiedades_destacadas = Property.objects.filter(
-        is_visible=True
-    ).order_by('-fecha_creacion')[:6]
+    # Las 6 propiedades visibles más recientes, ya resueltas y cacheadas
+    # como diccionarios (ver core/carrusel.py)
+    propiedades_destacadas = obtener_carrusel()
     
     contexto = {
         'propiedades': propiedades_destacadas,
@@ -37,21 +76,20 @@ def services_view(request):
     
     Incluye un formulario para solicitar asesoría crediticia.
     """
-    # Crear instancia vacía del formulario de asesoría
-    formulario_asesoria = CreditAdviceForm()
-    
     contexto = {
-        'form': formulario_asesoria,
+        'form': CreditAdviceForm(),
         'titulo_pagina': 'Nuestros Servicios'
     }
     
     return render(request, 'services.html', contexto)
 
 
+@require_POST
 def credit_advice_view(request):
     """
     Vista que procesa el formulario de solicitud de asesoría crediticia.
-    Solo acepta peticiones POST desde el formulario de servicios.
+    Solo acepta peticiones POST desde el formulario de servicios; cualquier
+    otro método recibe un 405 de @require_POST sin entrar a la vista.
     
     Proceso:
     1. Valida los datos del formulario
@@ -59,73 +97,47 @@ def credit_advice_view(request):
     3. Muestra un mensaje de éxito al usuario
     4. Redirige de vuelta a la página de servicios
     """
-    # Verificar que sea una petición POST
-    if request.method != 'POST':
-        # Si no es POST, redirigir a servicios
-        return redirect('core:services')
-    
     # Crear formulario con los datos recibidos
     form = CreditAdviceForm(request.POST)
     
     # Validar el formulario
     if form.is_valid():
-        # Extraer datos limpios del formulario
-        nombre = form.cleaned_data['nombre']
-        email = form.cleaned_data['email']
-        telefono = form.cleaned_data['telefono']
-        ingresos_mensuales = form.cleaned_data['ingresos_mensuales']
-        tipo_credito = form.cleaned_data['tipo_credito']
-        mensaje = form.cleaned_data.get('mensaje', '')
-        
-        # Preparar el asunto del email
-        asunto = f'Nueva solicitud de asesoría crediticia - {nombre}'
-        
-        # Crear el cuerpo del mensaje en texto plano
-        cuerpo_mensaje = f"""
-        Nueva solicitud de asesoría crediticia recibida:
+        datos = form.cleaned_data
         
-        Nombre: {nombre}
-        Email: {email}
-        Teléfono: {telefono}
-        Ingresos Mensuales: ${ingresos_mensuales:,.2f} MXN
-        Tipo de Crédito: {tipo_credito}
+        # Preparar el asunto y el cuerpo del email en texto plano
+        asunto = f'Nueva solicitud de asesoría crediticia - {datos["nombre"]}'
+        cuerpo_mensaje = _CUERPO_EMAIL_ASESORIA.format_map({
+            'nombre': datos['nombre'],
+            'email': datos['email'],
+            'telefono': datos['telefono'],
+            'ingresos_mensuales': f"{datos['ingresos_mensuales']:,.2f}",
+            'tipo_credito': datos['tipo_credito'],
+            'mensaje': datos.get('mensaje') or 'No proporcionó mensaje adicional',
+        })
         
-        Mensaje adicional:
-        {mensaje if mensaje else 'No proporcionó mensaje adicional'}
+        # Enviar el email al administrador en segundo plano
+        programar_email_asesoria(asunto, cuerpo_mensaje)
         
-        ---
-        Este correo fue enviado automáticamente desde el sitio web de Habitatum.
-        """
-        
-        try:
-            # Enviar el email al administrador
-            send_mail(
-                subject=asunto,
-                message=cuerpo_mensaje,
-                from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@habitatum.com',
-                recipient_list=[settings.ADMIN_EMAIL if hasattr(settings, 'ADMIN_EMAIL') else 'admin@habitatum.com'],
-                fail_silently=False,
-            )
-            
-            # Mostrar mensaje de éxito
-            messages.success(
-                request,
-                '¡Solicitud enviada con éxito! Nos pondremos en contacto contigo pronto.'
-            )
-            
-        except Exception as e:
-            # Si hay error al enviar el email, mostrar mensaje de error
-            messages.error(
-                request,
-                'Hubo un problema al enviar tu solicitud. Por favor, intenta de nuevo o contáctanos directamente.'
-            )
-            print(f"Error al enviar email de asesoría: {e}")
+        # Mostrar mensaje de éxito
+        messages.success(
+            request,
+            '¡Solicitud enviada con éxito! Nos pondremos en contacto contigo pronto.'
+        )
     
     else:
-        # Si el formulario no es válido, mostrar los errores
-        for field, errors in form.errors.items():
-            for error in errors:
-                messages.error(request, f"{field}: {error}")
+        # Si el formulario no es válido, mostrar todos los errores en un solo mensaje
+        messages.error(
+            request,
+            "; ".join(f"{field}: {error}" for field, errors in form.errors.items() for error in errors)
+        )
     
     # Redirigir de vuelta a la página de servicios
-    return redirect('core:services')
+    return HttpResponseRedirect(_url_servicios())
+
+
+@require_GET
+def robots_txt_view(request):
+    """
+    Vista que sirve /robots.txt en texto plano.
+    """
+    return HttpResponse(_ROBOTS_TXT, content_type='text/plain')
@@ -0,0 +1,37 @@
+"""
+Señales del panel de administración.
+
+Invalidan los conteos cacheados del panel: los del calendario de citas
+cuando se agenda, modifica o elimina una cita, y las estadísticas de
+propiedades cuando cambia una propiedad. La invalidación se hace al
+confirmar la transacción (ver properties/signals.py).
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from appointments.models import Appointment
+from properties.models import Property
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def invalidar_cache_calendario(sender, instance, **kwargs):
+    """
+    Elimina del cache los conteos del calendario del mes de la cita.
+    """
+    from .views import clave_cache_calendario
+    fecha = timezone.localtime(instance.fecha_cita)
+    clave = clave_cache_calendario(fecha.year, fecha.month)
+    transaction.on_commit(lambda: cache.delete(clave))
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidar_cache_estadisticas_propiedades(sender, instance, **kwargs):
+    """
+    Elimina del cache las estadísticas de la gestión de propiedades.
+    """
+    from .views import CLAVE_CACHE_ESTADISTICAS_PROPIEDADES
+    transaction.on_commit(lambda: cache.delete(CLAVE_CACHE_ESTADISTICAS_PROPIEDADES))
@@ -13,6 +13,9 @@ urlpatterns = [
     # Calendario de citas con código de colores
     path('calendario/', views.calendar_view, name='calendar'),
     
+    # Citas de un día del calendario (se carga con fetch desde el calendario)
+    path('calendario/<int:anio>/<int:mes>/<int:dia>/', views.calendar_day_view, name='calendar_day'),
+    
     # Ver detalles de una cita específica
     path('cita/<int:appointment_id>/', views.appointment_detail_view, name='appointment_detail'),
     
@@ -2,15 +2,137 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.utils import timezone
-from django.db.models import Count, Q
-from django.http import HttpResponse, JsonResponse
-from datetime import datetime, timedelta, date
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse
+from datetime import datetime, time, timedelta, date
 import calendar
 
 from appointments.models import Appointment, AvailableDay
+from appointments.views import clave_cache_propiedad, invalidar_cache_fechas_disponibles
+from core.carrusel import invalidar_carrusel
 from properties.models import Property, PropertyImage
 from properties.forms import PropertyForm
+from properties.tasks import programar_eliminacion_archivos
+from properties.views import invalidar_cache_galeria
+
+
+# Propiedades por página en la gestión de propiedades
+PROPIEDADES_POR_PAGINA = 25
+
+# Nombres de meses (índice 1-12) y de días de la semana (lunes = 0) en español
+NOMBRES_MESES = (
+    '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+)
+NOMBRES_DIAS = ('Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom')
+
+# Segundos que se cachean los conteos del calendario de citas. Las señales de
+# Appointment (dashboard/signals.py) invalidan el mes al cambiar una cita.
+TIEMPO_CACHE_CALENDARIO = 300
+
+
+def navegacion_mes(mes, anio):
+    """
+    Normaliza el mes pedido y calcula el mes anterior y el siguiente.
+    
+    El mes se lleva a un índice absoluto (anio * 12 + mes - 1), de modo que
+    valores fuera de 1-12 (por ejemplo mes=0 o mes=13 desde los enlaces de
+    navegación) pasan al año correspondiente con un solo divmod.
+    
+    Args:
+        mes: int - Mes solicitado (puede estar fuera de 1-12)
+        anio: int - Año solicitado
+        
+    Returns:
+        dict: mes_actual, anio_actual, mes_anterior, anio_anterior,
+        mes_siguiente y anio_siguiente
+    """
+    indice = anio * 12 + mes - 1
+    anio_actual, mes_actual = divmod(indice, 12)
+    anio_anterior, mes_anterior = divmod(indice - 1, 12)
+    anio_siguiente, mes_siguiente = divmod(indice + 1, 12)
+    return {
+        'mes_actual': mes_actual + 1,
+        'anio_actual': anio_actual,
+        'mes_anterior': mes_anterior + 1,
+        'anio_anterior': anio_anterior,
+        'mes_siguiente': mes_siguiente + 1,
+        'anio_siguiente': anio_siguiente,
+    }
+
+
+def limites_mes(anio, mes):
+    """
+    Primer día de un mes y primer día del mes siguiente.
+    
+    Se usan como rango semiabierto (>= inicio, < fin) en lugar de los lookups
+    __year/__month, que se traducen a EXTRACT y no aprovechan los índices.
+    
+    Args:
+        anio: int - Año
+        mes: int - Mes (1-12)
+        
+    Returns:
+        tuple: (date inicio, date fin)
+    """
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def limites_datetime(inicio, fin):
+    """
+    Convierte un rango de fechas en datetimes con zona horaria, a medianoche
+    en la zona local, para filtrar campos DateTimeField como fecha_cita.
+    """
+    return (
+        timezone.make_aware(datetime.combine(inicio, time.min)),
+        timezone.make_aware(datetime.combine(fin, time.min))
+    )
+
+
+# Clave y segundos de cache de las estadísticas de la gestión de propiedades
+CLAVE_CACHE_ESTADISTICAS_PROPIEDADES = 'estadisticas-propiedades'
+TIEMPO_CACHE_ESTADISTICAS = 300
+
+
+def clave_cache_calendario(anio, mes):
+    """
+    Construye la clave de cache para los conteos de citas de un mes.
+    """
+    return f'calendario-citas:{anio}:{mes}'
+
+
+def contar_citas_mes(anio, mes):
+    """
+    Cuenta las citas de un mes por día y tipo, desde el cache si es posible.
+    
+    El calendario se consulta igual por todos los administradores y solo
+    cambia cuando se agenda, modifica o elimina una cita.
+    
+    Args:
+        anio: int - Año
+        mes: int - Mes (1-12)
+        
+    Returns:
+        list: Diccionarios con 'fecha_cita__day', 'tipo_cita' y 'total'
+    """
+    inicio, fin = limites_datetime(*limites_mes(anio, mes))
+    return cache.get_or_set(
+        clave_cache_calendario(anio, mes),
+        lambda: list(
+            Appointment.objects.filter(
+                fecha_cita__gte=inicio,
+                fecha_cita__lt=fin
+            ).values('fecha_cita__day', 'tipo_cita').annotate(total=Count('id')).order_by()
+        ),
+        TIEMPO_CACHE_CALENDARIO
+    )
 
 
 def admin_login_view(request):
@@ -84,6 +206,30 @@ def admin_logout_view(request):
     return redirect('dashboard:login')
 
 
+def obtener_citas_del_dia(fecha):
+    """
+    Citas de un día, con el nombre de la propiedad, para la lista del calendario.
+    
+    Solo se leen las columnas que muestra la lista del día.
+    
+    Args:
+        fecha: date - Día a consultar
+        
+    Returns:
+        list: Appointment ordenadas por hora
+    """
+    inicio, fin = limites_datetime(fecha, fecha + timedelta(days=1))
+    return list(
+        Appointment.objects.filter(
+            fecha_cita__gte=inicio,
+            fecha_cita__lt=fin
+        ).select_related('property').only(
+            'id', 'nombre_cliente', 'email_cliente', 'telefono_cliente',
+            'fecha_cita', 'tipo_cita', 'property__nombre'
+        ).order_by('fecha_cita')
+    )
+
+
 @login_required(login_url='dashboard:login')
 def calendar_view(request):
     """
@@ -98,120 +244,97 @@ def calendar_view(request):
     Permite navegar entre meses (anterior/siguiente).
     Muestra la lista de citas cuando se hace clic en un día.
     """
-    # Obtener mes y año de la URL, o usar el mes actual
-    mes_actual = int(request.GET.get('mes', timezone.now().month))
-    anio_actual = int(request.GET.get('anio', timezone.now().year))
-    
-    # Validar que el mes esté en rango válido (1-12)
-    if mes_actual < 1:
-        mes_actual = 12
-        anio_actual -= 1
-    elif mes_actual > 12:
-        mes_actual = 1
-        anio_actual += 1
-    
-    # Calcular mes anterior y siguiente para navegación
-    if mes_actual == 1:
-        mes_anterior = 12
-        anio_anterior = anio_actual - 1
-    else:
-        mes_anterior = mes_actual - 1
-        anio_anterior = anio_actual
-    
-    if mes_actual == 12:
-        mes_siguiente = 1
-        anio_siguiente = anio_actual + 1
-    else:
-        mes_siguiente = mes_actual + 1
-        anio_siguiente = anio_actual
-    
-    # Obtener todas las citas del mes seleccionado
-    citas_del_mes = Appointment.objects.filter(
-        fecha_cita__year=anio_actual,
-        fecha_cita__month=mes_actual
-    ).select_related('property')  # Optimización: cargar propiedad en la misma consulta
-    
-    # Agrupar citas por día
-    citas_por_dia = {}
-    for cita in citas_del_mes:
-        dia = cita.fecha_cita.day
-        if dia not in citas_por_dia:
-            citas_por_dia[dia] = []
-        citas_por_dia[dia].append(cita)
+    # Mes mostrado y meses vecinos para la navegación
+    navegacion = navegacion_mes(
+        int(request.GET.get('mes', timezone.now().month)),
+        int(request.GET.get('anio', timezone.now().year))
+    )
+    mes_actual = navegacion['mes_actual']
+    anio_actual = navegacion['anio_actual']
+    
+    # Contar las citas del mes por día y tipo en una sola consulta agregada
+    # (cacheada): el color de cada día solo necesita la cantidad, no las filas
+    conteos_del_mes = contar_citas_mes(anio_actual, mes_actual)
+    
+    citas_por_dia_count = {}
+    citas_normales = 0
+    citas_prioritarias = 0
+    for fila in conteos_del_mes:
+        dia = fila['fecha_cita__day']
+        citas_por_dia_count[dia] = citas_por_dia_count.get(dia, 0) + fila['total']
+        if fila['tipo_cita'] == 'normal':
+            citas_normales += fila['total']
+        elif fila['tipo_cita'] == 'prioritaria':
+            citas_prioritarias += fila['total']
+    total_citas_mes = sum(citas_por_dia_count.values())
     
     # Crear estructura de días con colores
     dias_calendario = {}
-    for dia in range(1, 32):  # Máximo 31 días
-        try:
-            # Verificar que el día existe en este mes
-            fecha = datetime(anio_actual, mes_actual, dia)
-            
-            if dia in citas_por_dia:
-                cantidad = len(citas_por_dia[dia])
-                
-                # Asignar color según cantidad de citas
-                if cantidad == 1:
-                    color = 'verde'
-                elif cantidad <= 4:
-                    color = 'amarillo'
-                else:
-                    color = 'rojo'
-                
-                dias_calendario[dia] = {
-                    'cantidad': cantidad,
-                    'color': color,
-                    'citas': citas_por_dia[dia]
-                }
-            else:
-                # Día sin citas
-                dias_calendario[dia] = {
-                    'cantidad': 0,
-                    'color': None,
-                    'citas': []
-                }
-        except ValueError:
-            # Día no válido para este mes (ej: 31 de febrero)
-            break
-    
-    # Obtener día seleccionado (si se hizo clic en un día)
+    for dia in range(1, calendar.monthrange(anio_actual, mes_actual)[1] + 1):
+        cantidad = citas_por_dia_count.get(dia, 0)
+        
+        # Asignar color según cantidad de citas
+        if cantidad == 0:
+            color = None
+        elif cantidad == 1:
+            color = 'verde'
+        elif cantidad <= 4:
+            color = 'amarillo'
+        else:
+            color = 'rojo'
+        
+        dias_calendario[dia] = {
+            'cantidad': cantidad,
+            'color': color
+        }
+    
+    # Obtener día seleccionado (si se hizo clic en un día); solo entonces se
+    # cargan las citas completas, y únicamente las de ese día
     dia_seleccionado = request.GET.get('dia', None)
     citas_del_dia = []
     if dia_seleccionado:
         dia_seleccionado = int(dia_seleccionado)
-        if dia_seleccionado in citas_por_dia:
-            citas_del_dia = citas_por_dia[dia_seleccionado]
-    
-    # Nombres de meses en español
-    nombres_meses = [
-        '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-        'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-    ]
-    
-    # Estadísticas del mes
-    total_citas_mes = citas_del_mes.count()
-    citas_normales = citas_del_mes.filter(tipo_cita='normal').count()
-    citas_prioritarias = citas_del_mes.filter(tipo_cita='prioritaria').count()
+        if dia_seleccionado in citas_por_dia_count:
+            citas_del_dia = obtener_citas_del_dia(date(anio_actual, mes_actual, dia_seleccionado))
     
     contexto = {
         'dias_calendario': dias_calendario,
-        'mes_actual': mes_actual,
-        'anio_actual': anio_actual,
-        'nombre_mes': nombres_meses[mes_actual],
-        'mes_anterior': mes_anterior,
-        'anio_anterior': anio_actual - 1 if mes_anterior == 12 else anio_anterior,
-        'mes_siguiente': mes_siguiente,
-        'anio_siguiente': anio_actual + 1 if mes_siguiente == 1 else anio_siguiente,
+        **navegacion,
+        'nombre_mes': NOMBRES_MESES[mes_actual],
         'dia_seleccionado': dia_seleccionado,
         'citas_del_dia': citas_del_dia,
         'total_citas_mes': total_citas_mes,
         'citas_normales': citas_normales,
         'citas_prioritarias': citas_prioritarias,
-        'titulo_pagina': f'Calendario - {nombres_meses[mes_actual]} {anio_actual}'
+        'titulo_pagina': f'Calendario - {NOMBRES_MESES[mes_actual]} {anio_actual}'
     }
     
     return render(request, 'admin/calendar.html', contexto)
 
 
+@login_required(login_url='dashboard:login')
+def calendar_day_view(request, anio, mes, dia):
+    """
+    Vista parcial con las citas de un día del calendario.
+    
+    El calendario la carga con fetch al hacer clic en un día, de modo que
+    la página principal solo calcula los conteos del mes y las filas de
+    citas se consultan únicamente para el día que se abre.
+    """
+    try:
+        fecha = date(anio, mes, dia)
+    except ValueError:
+        raise Http404("Fecha no válida.")
+    
+    contexto = {
+        'dia_seleccionado': dia,
+        'nombre_mes': NOMBRES_MESES[mes],
+        'citas_del_dia': obtener_citas_del_dia(fecha),
+    }
+    
+    return render(request, 'admin/_citas_del_dia.html', contexto)
+
+
 @login_required(login_url='dashboard:login')
 def appointment_detail_view(request, appointment_id):
     """
@@ -225,8 +348,8 @@ def appointment_detail_view(request, appointment_id):
     - Si es prioritaria: ingresos mensuales y tipo de crédito
     - ID del evento en Google Calendar (si existe)
     """
-    # Obtener la cita o mostrar 404
-    cita = get_object_or_404(Appointment, pk=appointment_id)
+    # Obtener la cita (con su propiedad en la misma consulta) o mostrar 404
+    cita = get_object_or_404(Appointment.objects.select_related('property'), pk=appointment_id)
     
     contexto = {
         'cita': cita,
@@ -236,6 +359,33 @@ def appointment_detail_view(request, appointment_id):
     return render(request, 'admin/appointment_detail.html', contexto)
 
 
+def obtener_estadisticas_propiedades():
+    """
+    Conteos de propiedades para la gestión de propiedades, desde el cache si
+    es posible.
+    
+    Todos los conteos salen de una sola consulta agregada, con un conteo por
+    cada tipo de inmueble definido en el modelo. Las señales de Property
+    (dashboard/signals.py) invalidan el cache al guardar o eliminar una
+    propiedad.
+    
+    Returns:
+        dict: 'total', 'visibles' y 'tipo_<codigo>' por cada tipo de inmueble
+    """
+    return cache.get_or_set(
+        CLAVE_CACHE_ESTADISTICAS_PROPIEDADES,
+        lambda: Property.objects.aggregate(
+            total=Count('id'),
+            visibles=Count('id', filter=Q(is_visible=True)),
+            **{
+                f'tipo_{codigo}': Count('id', filter=Q(tipo_inmueble=codigo))
+                for codigo, _ in Property.PROPERTY_TYPES
+            }
+        ),
+        TIEMPO_CACHE_ESTADISTICAS
+    )
+
+
 @login_required(login_url='dashboard:login')
 def admin_property_list_view(request):
     """
@@ -271,24 +421,36 @@ def admin_property_list_view(request):
             Q(ubicacion__icontains=busqueda)
         )
     
-    # Ordenar por fecha de creación (más recientes primero)
-    propiedades = propiedades.order_by('-fecha_creacion')
-    
-    # Estadísticas
-    total_propiedades = Property.objects.count()
-    total_casas = Property.objects.filter(tipo_inmueble='casa').count()
-    total_departamentos = Property.objects.filter(tipo_inmueble='departamento').count()
-    total_terrenos = Property.objects.filter(tipo_inmueble='terreno').count()
-    propiedades_visibles = Property.objects.filter(is_visible=True).count()
-    propiedades_ocultas = Property.objects.filter(is_visible=False).count()
-    
-    # Tipos disponibles para el filtro
-    tipos_disponibles = Property.objects.values_list(
-        'tipo_inmueble', flat=True
-    ).distinct()
+    # Ordenar por fecha de creación (más recientes primero) y leer solo las
+    # columnas que muestra la tabla (sin la descripción)
+    propiedades = propiedades.only(
+        'id', 'nombre', 'ubicacion', 'tipo_inmueble', 'precio',
+        'metros_cuadrados', 'is_visible', 'fecha_creacion', 'imagen_principal',
+        'miniatura'
+    ).order_by('-fecha_creacion')
+    
+    # Paginar: la consulta solo trae las filas de la página actual
+    paginator = Paginator(propiedades, PROPIEDADES_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    # Estadísticas (una sola consulta agregada, cacheada)
+    estadisticas = obtener_estadisticas_propiedades()
+    total_propiedades = estadisticas['total']
+    total_casas = estadisticas['tipo_casa']
+    total_departamentos = estadisticas['tipo_departamento']
+    total_terrenos = estadisticas['tipo_terreno']
+    propiedades_visibles = estadisticas['visibles']
+    propiedades_ocultas = total_propiedades - propiedades_visibles
+    
+    # Tipos disponibles para el filtro (los que tienen al menos una propiedad)
+    tipos_disponibles = [
+        codigo for codigo, _ in Property.PROPERTY_TYPES
+        if estadisticas[f'tipo_{codigo}']
+    ]
     
     contexto = {
-        'propiedades': propiedades,
+        'propiedades': page_obj,
+        'page_obj': page_obj,
         'total_propiedades': total_propiedades,
         'total_casas': total_casas,
         'total_departamentos': total_departamentos,
@@ -305,6 +467,28 @@ def admin_property_list_view(request):
     return render(request, 'admin/admin_property_list.html', contexto)
 
 
+def crear_imagenes_adicionales(propiedad, imagenes, orden_inicial=0):
+    """
+    Crea las imágenes adicionales de una propiedad con un solo INSERT.
+    
+    Cada archivo se guarda en el storage al preparar su fila (pre_save del
+    ImageField), y todas las filas se insertan juntas con bulk_create en lugar
+    de un INSERT por imagen.
+    
+    Args:
+        propiedad: Property a la que pertenecen las imágenes
+        imagenes: lista de archivos subidos
+        orden_inicial: int - orden de la última imagen existente
+        
+    Returns:
+        list: PropertyImage creadas
+    """
+    return PropertyImage.objects.bulk_create([
+        PropertyImage(property=propiedad, imagen=imagen, orden=orden_inicial + index + 1)
+        for index, imagen in enumerate(imagenes)
+    ])
+
+
 @login_required(login_url='dashboard:login')
 def property_create_view(request):
     """
@@ -320,18 +504,12 @@ def property_create_view(request):
         form = PropertyForm(request.POST, request.FILES)
         
         if form.is_valid():
-            # Guardar la propiedad
-            nueva_propiedad = form.save()
-            
-            # Procesar imágenes adicionales si se subieron
             imagenes_adicionales = request.FILES.getlist('imagenes_adicionales')
             
-            for index, imagen in enumerate(imagenes_adicionales):
-                PropertyImage.objects.create(
-                    property=nueva_propiedad,
-                    imagen=imagen,
-                    orden=index + 1
-                )
+            # La propiedad y sus imágenes adicionales se guardan en una sola transacción
+            with transaction.atomic():
+                nueva_propiedad = form.save()
+                crear_imagenes_adicionales(nueva_propiedad, imagenes_adicionales)
             
             messages.success(
                 request,
@@ -375,36 +553,41 @@ def property_update_view(request, pk):
         form = PropertyForm(request.POST, request.FILES, instance=propiedad)
         
         if form.is_valid():
-            propiedad_actualizada = form.save()
-            
-            # Procesar nuevas imágenes adicionales si se subieron
             imagenes_adicionales = request.FILES.getlist('imagenes_adicionales')
+            imagenes_a_eliminar = request.POST.getlist('eliminar_imagenes')
             
-            if imagenes_adicionales:
-                # Obtener el orden máximo actual
-                orden_maximo = PropertyImage.objects.filter(
-                    property=propiedad
-                ).count()
+            # Propiedad, imágenes nuevas y eliminadas se guardan en una sola transacción
+            with transaction.atomic():
+                propiedad_actualizada = form.save()
                 
-                for index, imagen in enumerate(imagenes_adicionales):
-                    PropertyImage.objects.create(
-                        property=propiedad_actualizada,
-                        imagen=imagen,
-                        orden=orden_maximo + index + 1
+                # Procesar nuevas imágenes adicionales si se subieron
+                if imagenes_adicionales:
+                    # Obtener el orden máximo actual (no el número de imágenes:
+                    # tras eliminar alguna, el conteo repetiría órdenes existentes)
+                    orden_maximo = PropertyImage.objects.filter(
+                        property=propiedad
+                    ).aggregate(maximo=Max('orden'))['maximo'] or 0
+                    crear_imagenes_adicionales(propiedad_actualizada, imagenes_adicionales, orden_maximo)
+                
+                # Eliminar imágenes marcadas para eliminar (solo de esta propiedad)
+                # y sus archivos, leyendo las rutas antes del DELETE
+                total_eliminadas = 0
+                if imagenes_a_eliminar:
+                    imagenes_eliminadas = PropertyImage.objects.filter(
+                        property=propiedad,
+                        id__in=imagenes_a_eliminar
                     )
-            
-            # Eliminar imágenes marcadas para eliminar
-            imagenes_a_eliminar = request.POST.getlist('eliminar_imagenes')
-            if imagenes_a_eliminar:
-                PropertyImage.objects.filter(
-                    id__in=imagenes_a_eliminar
-                ).delete()
+                    archivos = list(
+                        imagenes_eliminadas.exclude(imagen='').values_list('imagen', flat=True)
+                    )
+                    total_eliminadas, _ = imagenes_eliminadas.delete()
+                    programar_eliminacion_archivos(archivos)
             
             mensaje = f'Propiedad "{propiedad_actualizada.nombre}" actualizada exitosamente.'
             if imagenes_adicionales:
                 mensaje += f' Se agregaron {len(imagenes_adicionales)} imagen(es).'
-            if imagenes_a_eliminar:
-                mensaje += f' Se eliminaron {len(imagenes_a_eliminar)} imagen(es).'
+            if total_eliminadas:
+                mensaje += f' Se eliminaron {total_eliminadas} imagen(es).'
 
             messages.success(request, mensaje, extra_tags='alert alert-success')
             
@@ -445,19 +628,30 @@ def property_toggle_visibility_view(request, pk):
     - Propiedades en mantenimiento/actualización
     - Propiedades temporalmente no disponibles
     """
-    propiedad = get_object_or_404(Property, pk=pk)
-    
-    # Cambiar el estado de visibilidad
+    # Cambiar el estado de visibilidad con un solo UPDATE de esa columna,
+    # sin cargar ni volver a guardar la propiedad completa
+    actualizadas = Property.objects.filter(pk=pk).update(
+        is_visible=~F('is_visible'),
+        fecha_actualizacion=timezone.now()
+    )
+    if not actualizadas:
+        raise Http404("No existe una propiedad con ese ID.")
+    
+    # update() no emite señales: invalidar a mano la propiedad cacheada de
+    # la vista de citas, el carousel de la página principal, las estadísticas
+    # y la galería pública
+    cache.delete_many([clave_cache_propiedad(pk), CLAVE_CACHE_ESTADISTICAS_PROPIEDADES])
+    invalidar_carrusel()
+    invalidar_cache_galeria(pk)
+    
+    # Leer solo lo necesario para el mensaje
+    propiedad = Property.objects.only('nombre', 'is_visible').get(pk=pk)
     if propiedad.is_visible:
-        propiedad.is_visible = False
-        accion = 'ocultada'
-        estado = 'No visible'
-    else:
-        propiedad.is_visible = True
         accion = 'mostrada'
         estado = 'Visible'
-    
-    propiedad.save()
+    else:
+        accion = 'ocultada'
+        estado = 'No visible'
     
     messages.success(
         request,
@@ -484,7 +678,22 @@ def property_delete_view(request, pk):
     
     ADVERTENCIA: Esta acción es irreversible.
     """
-    propiedad = get_object_or_404(Property, pk=pk)
+    # Propiedad con sus conteos de imágenes y citas en la misma consulta. Cada
+    # conteo es una subconsulta correlacionada: dos Count() sobre relaciones
+    # inversas distintas unirían imágenes × citas antes del DISTINCT
+    imagenes = PropertyImage.objects.filter(
+        property=OuterRef('pk')
+    ).order_by().values('property').annotate(total=Count('*')).values('total')
+    citas = Appointment.objects.filter(
+        property=OuterRef('pk')
+    ).order_by().values('property').annotate(total=Count('*')).values('total')
+    propiedad = get_object_or_404(
+        Property.objects.annotate(
+            total_imagenes=Coalesce(Subquery(imagenes), 0),
+            total_citas=Coalesce(Subquery(citas), 0)
+        ),
+        pk=pk
+    )
     
     if request.method == 'POST':
         # Verificar confirmación del usuario
@@ -494,25 +703,24 @@ def property_delete_view(request, pk):
             # Guardar información antes de eliminar
             nombre_propiedad = propiedad.nombre
             
-            # Contar citas asociadas que se eliminarán
-            citas_asociadas = propiedad.citas.count()
+            # Citas asociadas que se eliminarán (ya contadas en la consulta)
+            citas_asociadas = propiedad.total_citas
             
-            # Eliminar imágenes físicas del servidor
-            if propiedad.imagen_principal:
-                try:
-                    propiedad.imagen_principal.delete(save=False)
-                except Exception as e:
-                    print(f"Error al eliminar imagen principal: {e}")
-            
-            for imagen in propiedad.imagenes.all():
-                try:
-                    imagen.imagen.delete(save=False)
-                except Exception as e:
-                    print(f"Error al eliminar imagen adicional: {e}")
+            # Rutas de las imágenes físicas, sin cargar cada PropertyImage
+            archivos = [
+                archivo.name for archivo in (propiedad.imagen_principal, propiedad.miniatura)
+                if archivo
+            ]
+            archivos.extend(
+                propiedad.imagenes.exclude(imagen='').values_list('imagen', flat=True)
+            )
             
             # Eliminar la propiedad (esto eliminará también las citas y registros relacionados por cascade)
             propiedad.delete()
             
+            # Borrar los archivos del servidor en segundo plano
+            programar_eliminacion_archivos(archivos)
+            
             messages.success(
                 request,
                 f'Propiedad "{nombre_propiedad}" eliminada permanentemente. '
@@ -528,14 +736,10 @@ def property_delete_view(request, pk):
             return redirect('dashboard:property_delete', pk=pk)
     
     # GET: Mostrar página de confirmación
-    # Obtener información adicional para mostrar en la confirmación
-    total_imagenes = propiedad.imagenes.count()
-    total_citas = propiedad.citas.count()
-    
     contexto = {
         'propiedad': propiedad,
-        'total_imagenes': total_imagenes,
-        'total_citas': total_citas,
+        'total_imagenes': propiedad.total_imagenes,
+        'total_citas': propiedad.total_citas,
         'titulo_pagina': f'Eliminar - {propiedad.nombre}'
     }
     
@@ -561,58 +765,46 @@ def assign_days_view(request):
     return render(request, 'admin/assign_days_menu.html', contexto)
 
 
-@login_required(login_url='dashboard:login')
-def assign_normal_days_view(request):
+def procesar_asignacion_dias(request, tipo_cita, nombre_tipo, capacidad_por_defecto):
     """
-    Vista para asignar días disponibles para citas normales.
+    Muestra y procesa el calendario de asignación de días disponibles para
+    un tipo de cita.
     
     Permite al administrador:
     - Ver un calendario del mes actual
-    - Marcar/desmarcar días como disponibles para citas normales
+    - Marcar/desmarcar días como disponibles para el tipo de cita
     - Navegar entre meses
-    - Ver visualmente qué días ya están ocupados con citas
+    - Ver visualmente qué días ya están ocupados con citas de ese tipo
     - Establecer capacidad máxima de citas por día
     
     Los días se guardan en la tabla AvailableDay de la base de datos.
-    """
-    # Nombres de meses en español
-    nombres_meses = [
-        '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-        'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-    ]
     
-    # Obtener mes y año de la URL
-    mes_actual = int(request.GET.get('mes', timezone.now().month))
-    anio_actual = int(request.GET.get('anio', timezone.now().year))
-    
-    # Validar que el mes esté en rango válido
-    if mes_actual < 1:
-        mes_actual = 12
-        anio_actual -= 1
-    elif mes_actual > 12:
-        mes_actual = 1
-        anio_actual += 1
-    
-    # Calcular mes anterior y siguiente
-    if mes_actual == 1:
-        mes_anterior = 12
-        anio_anterior = anio_actual - 1
-    else:
-        mes_anterior = mes_actual - 1
-        anio_anterior = anio_actual
+    Args:
+        request: HttpRequest
+        tipo_cita: str - 'normal' o 'prioritaria'
+        nombre_tipo: str - tipo en plural para los mensajes ('normales', 'prioritarias')
+        capacidad_por_defecto: int - capacidad sugerida si el mes no tiene días
+        
+    Returns:
+        HttpResponse
+    """
+    # Mes mostrado y meses vecinos para la navegación
+    navegacion = navegacion_mes(
+        int(request.GET.get('mes', timezone.now().month)),
+        int(request.GET.get('anio', timezone.now().year))
+    )
+    mes_actual = navegacion['mes_actual']
+    anio_actual = navegacion['anio_actual']
     
-    if mes_actual == 12:
-        mes_siguiente = 1
-        anio_siguiente = anio_actual + 1
-    else:
-        mes_siguiente = mes_actual + 1
-        anio_siguiente = anio_actual
+    # Rango del mes para las consultas (índices sobre las fechas)
+    primer_dia, primer_dia_siguiente = limites_mes(anio_actual, mes_actual)
+    inicio_mes, fin_mes = limites_datetime(primer_dia, primer_dia_siguiente)
     
     # Procesar formulario si se marcaron/desmarcaron días
     if request.method == 'POST':
         # Obtener días seleccionados del formulario
         dias_seleccionados = request.POST.getlist('dias_disponibles')
-        capacidad_maxima = int(request.POST.get('capacidad_maxima', 3))
+        capacidad_maxima = int(request.POST.get('capacidad_maxima', capacidad_por_defecto))
         
         # Convertir a fechas
         fechas_seleccionadas = []
@@ -626,9 +818,9 @@ def assign_normal_days_view(request):
         
         # Obtener días disponibles existentes para este mes y tipo
         dias_existentes = AvailableDay.objects.filter(
-            fecha_disponible__year=anio_actual,
-            fecha_disponible__month=mes_actual,
-            tipo_cita='normal'
+            fecha_disponible__gte=primer_dia,
+            fecha_disponible__lt=primer_dia_siguiente,
+            tipo_cita=tipo_cita
         )
         
         fechas_existentes = set(dias_existentes.values_list('fecha_disponible', flat=True))
@@ -639,7 +831,7 @@ def assign_normal_days_view(request):
         if dias_a_eliminar:
             AvailableDay.objects.filter(
                 fecha_disponible__in=dias_a_eliminar,
-                tipo_cita='normal'
+                tipo_cita=tipo_cita
             ).delete()
         
         # Días a agregar (no estaban marcados pero ahora sí)
@@ -649,7 +841,7 @@ def assign_normal_days_view(request):
             if fecha >= timezone.now().date():
                 AvailableDay.objects.create(
                     fecha_disponible=fecha,
-                    tipo_cita='normal',
+                    tipo_cita=tipo_cita,
                     capacidad_maxima=capacidad_maxima
                 )
         
@@ -658,23 +850,29 @@ def assign_normal_days_view(request):
         if dias_a_actualizar:
             AvailableDay.objects.filter(
                 fecha_disponible__in=dias_a_actualizar,
-                tipo_cita='normal'
+                tipo_cita=tipo_cita
             ).update(capacidad_maxima=capacidad_maxima)
         
+        # update() no emite señales: invalidar el cache del mes y de los días actualizados
+        invalidar_cache_fechas_disponibles([date(anio_actual, mes_actual, 1), *dias_a_actualizar], tipo_cita)
+        
         messages.success(
             request,
-            f'Días disponibles actualizados para citas normales en {nombres_meses[mes_actual]} {anio_actual}.',
+            f'Días disponibles actualizados para citas {nombre_tipo} en {NOMBRES_MESES[mes_actual]} {anio_actual}.',
             extra_tags='alert alert-success'
         )
         
         # Redirigir para evitar reenvío del formulario
         return redirect(f"{request.path}?mes={mes_actual}&anio={anio_actual}")
     
-    # Obtener días disponibles de la BD para este mes
-    dias_disponibles_bd = AvailableDay.objects.filter(
-        fecha_disponible__year=anio_actual,
-        fecha_disponible__month=mes_actual,
-        tipo_cita='normal'
+    # Obtener días disponibles de la BD para este mes, con el número de
+    # citas de cada día resuelto en la misma consulta
+    dias_disponibles_bd = list(
+        AvailableDay.objects.filter(
+            fecha_disponible__gte=primer_dia,
+            fecha_disponible__lt=primer_dia_siguiente,
+            tipo_cita=tipo_cita
+        ).con_citas_count()
     )
     
     # Crear diccionario de días disponibles
@@ -683,243 +881,75 @@ def assign_normal_days_view(request):
         fechas_disponibles[dia_disp.fecha_disponible.day] = {
             'capacidad_maxima': dia_disp.capacidad_maxima,
             'capacidad_disponible': dia_disp.obtener_capacidad_disponible(),
-            'citas_agendadas': dia_disp.obtener_citas_agendadas().count(),
+            'citas_agendadas': dia_disp.citas_count,
             'esta_disponible': dia_disp.esta_disponible()
         }
     
-    # Obtener citas normales existentes en este mes
-    citas_normales_mes = Appointment.objects.filter(
-        fecha_cita__year=anio_actual,
-        fecha_cita__month=mes_actual,
-        tipo_cita='normal'
+    # Contar las citas de este tipo por día del mes en una sola consulta agregada
+    dias_con_citas = dict(
+        Appointment.objects.filter(
+            fecha_cita__gte=inicio_mes,
+            fecha_cita__lt=fin_mes,
+            tipo_cita=tipo_cita
+        ).values_list('fecha_cita__day').annotate(total=Count('id')).order_by()
     )
     
-    # Crear diccionario con días que tienen citas
-    dias_con_citas = {}
-    for cita in citas_normales_mes:
-        dia = cita.fecha_cita.day
-        if dia not in dias_con_citas:
-            dias_con_citas[dia] = 0
-        dias_con_citas[dia] += 1
+    # Generar estructura de días del mes. El día de la semana se deriva del
+    # primer día del mes y "es pasado" de un solo número (el último día ya
+    # pasado del mes mostrado), sin construir una fecha por cada día.
+    primer_dia_semana, total_dias = calendar.monthrange(anio_actual, mes_actual)
+    hoy = timezone.now().date()
+    if (anio_actual, mes_actual) < (hoy.year, hoy.month):
+        ultimo_dia_pasado = total_dias
+    elif (anio_actual, mes_actual) == (hoy.year, hoy.month):
+        ultimo_dia_pasado = hoy.day - 1
+    else:
+        ultimo_dia_pasado = 0
     
-    # Generar estructura de días del mes
     dias_del_mes = []
-    for dia in range(1, 32):
-        try:
-            fecha = date(anio_actual, mes_actual, dia)
-            dia_info = {
-                'numero': dia,
-                'nombre_dia': ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'][fecha.weekday()],
-                'citas': dias_con_citas.get(dia, 0),
-                'es_pasado': fecha < timezone.now().date(),
-                'esta_disponible': dia in fechas_disponibles,
-                'capacidad_info': fechas_disponibles.get(dia, None)
-            }
-            dias_del_mes.append(dia_info)
-        except ValueError:
-            break
+    for dia in range(1, total_dias + 1):
+        dia_info = {
+            'numero': dia,
+            'nombre_dia': NOMBRES_DIAS[(primer_dia_semana + dia - 1) % 7],
+            'citas': dias_con_citas.get(dia, 0),
+            'es_pasado': dia <= ultimo_dia_pasado,
+            'esta_disponible': dia in fechas_disponibles,
+            'capacidad_info': fechas_disponibles.get(dia, None)
+        }
+        dias_del_mes.append(dia_info)
     
     # Obtener capacidad máxima actual (del primer día disponible o default)
-    capacidad_actual = 3
-    if dias_disponibles_bd.exists():
-        capacidad_actual = dias_disponibles_bd.first().capacidad_maxima
+    capacidad_actual = capacidad_por_defecto
+    if dias_disponibles_bd:
+        capacidad_actual = dias_disponibles_bd[0].capacidad_maxima
     
     contexto = {
         'dias_del_mes': dias_del_mes,
-        'mes_actual': mes_actual,
-        'anio_actual': anio_actual,
-        'nombre_mes': nombres_meses[mes_actual],
-        'mes_anterior': mes_anterior,
-        'anio_anterior': anio_actual - 1 if mes_anterior == 12 else anio_anterior,
-        'mes_siguiente': mes_siguiente,
-        'anio_siguiente': anio_actual + 1 if mes_siguiente == 1 else anio_siguiente,
-        'tipo_cita': 'normal',
+        **navegacion,
+        'nombre_mes': NOMBRES_MESES[mes_actual],
+        'tipo_cita': tipo_cita,
         'capacidad_actual': capacidad_actual,
-        'titulo_pagina': f'Días Disponibles - Citas Normales - {nombres_meses[mes_actual]} {anio_actual}'
+        'titulo_pagina': f'Días Disponibles - Citas {nombre_tipo.capitalize()} - {NOMBRES_MESES[mes_actual]} {anio_actual}'
     }
     
     return render(request, 'admin/assign_days.html', contexto)
 
 
+@login_required(login_url='dashboard:login')
+def assign_normal_days_view(request):
+    """
+    Vista para asignar días disponibles para citas normales.
+    """
+    return procesar_asignacion_dias(request, 'normal', 'normales', capacidad_por_defecto=3)
+
+
 @login_required(login_url='dashboard:login')
 def assign_priority_days_view(request):
     """
     Vista para asignar días disponibles para citas prioritarias.
     
-    Funcionalidad idéntica a assign_normal_days_view pero para
-    citas prioritarias (aquellas que incluyen asesoría crediticia).
-    
-    Permite al administrador:
-    - Ver un calendario del mes actual
-    - Marcar/desmarcar días como disponibles para citas prioritarias
-    - Navegar entre meses
-    - Ver visualmente qué días ya están ocupados con citas prioritarias
-    - Establecer capacidad máxima de citas por día
-    
     Nota: Los días disponibles para citas prioritarias pueden ser
     diferentes a los días de citas normales, permitiendo al administrador
     reservar días específicos para asesorías más complejas.
     """
-    # Nombres de meses en español
-    nombres_meses = [
-        '', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-        'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
-    ]
-    
-    # Obtener mes y año de la URL
-    mes_actual = int(request.GET.get('mes', timezone.now().month))
-    anio_actual = int(request.GET.get('anio', timezone.now().year))
-    
-    # Validar que el mes esté en rango válido
-    if mes_actual < 1:
-        mes_actual = 12
-        anio_actual -= 1
-    elif mes_actual > 12:
-        mes_actual = 1
-        anio_actual += 1
-    
-    # Calcular mes anterior y siguiente
-    if mes_actual == 1:
-        mes_anterior = 12
-        anio_anterior = anio_actual - 1
-    else:
-        mes_anterior = mes_actual - 1
-        anio_anterior = anio_actual
-    
-    if mes_actual == 12:
-        mes_siguiente = 1
-        anio_siguiente = anio_actual + 1
-    else:
-        mes_siguiente = mes_actual + 1
-        anio_siguiente = anio_actual
-    
-    # Procesar formulario si se marcaron/desmarcaron días
-    if request.method == 'POST':
-        # Obtener días seleccionados del formulario
-        dias_seleccionados = request.POST.getlist('dias_disponibles')
-        capacidad_maxima = int(request.POST.get('capacidad_maxima', 2))
-        
-        # Convertir a fechas
-        fechas_seleccionadas = []
-        for dia_str in dias_seleccionados:
-            try:
-                dia_num = int(dia_str)
-                fecha = date(anio_actual, mes_actual, dia_num)
-                fechas_seleccionadas.append(fecha)
-            except (ValueError, TypeError):
-                continue
-        
-        # Obtener días disponibles existentes para este mes y tipo
-        dias_existentes = AvailableDay.objects.filter(
-            fecha_disponible__year=anio_actual,
-            fecha_disponible__month=mes_actual,
-            tipo_cita='prioritaria'
-        )
-        
-        fechas_existentes = set(dias_existentes.values_list('fecha_disponible', flat=True))
-        fechas_nuevas = set(fechas_seleccionadas)
-        
-        # Días a eliminar (estaban marcados pero ya no)
-        dias_a_eliminar = fechas_existentes - fechas_nuevas
-        if dias_a_eliminar:
-            AvailableDay.objects.filter(
-                fecha_disponible__in=dias_a_eliminar,
-                tipo_cita='prioritaria'
-            ).delete()
-        
-        # Días a agregar (no estaban marcados pero ahora sí)
-        dias_a_agregar = fechas_nuevas - fechas_existentes
-        for fecha in dias_a_agregar:
-            # Verificar que no sea un día del pasado
-            if fecha >= timezone.now().date():
-                AvailableDay.objects.create(
-                    fecha_disponible=fecha,
-                    tipo_cita='prioritaria',
-                    capacidad_maxima=capacidad_maxima
-                )
-        
-        # Actualizar capacidad de días existentes que siguen marcados
-        dias_a_actualizar = fechas_existentes & fechas_nuevas
-        if dias_a_actualizar:
-            AvailableDay.objects.filter(
-                fecha_disponible__in=dias_a_actualizar,
-                tipo_cita='prioritaria'
-            ).update(capacidad_maxima=capacidad_maxima)
-        
-        messages.success(
-            request,
-            f'Días disponibles actualizados para citas prioritarias en {nombres_meses[mes_actual]} {anio_actual}.',
-            extra_tags='alert alert-success'
-        )
-        
-        return redirect(f"{request.path}?mes={mes_actual}&anio={anio_actual}")
-    
-    # Obtener días disponibles de la BD para este mes
-    dias_disponibles_bd = AvailableDay.objects.filter(
-        fecha_disponible__year=anio_actual,
-        fecha_disponible__month=mes_actual,
-        tipo_cita='prioritaria'
-    )
-    
-    # Crear diccionario de días disponibles
-    fechas_disponibles = {}
-    for dia_disp in dias_disponibles_bd:
-        fechas_disponibles[dia_disp.fecha_disponible.day] = {
-            'capacidad_maxima': dia_disp.capacidad_maxima,
-            'capacidad_disponible': dia_disp.obtener_capacidad_disponible(),
-            'citas_agendadas': dia_disp.obtener_citas_agendadas().count(),
-            'esta_disponible': dia_disp.esta_disponible()
-        }
-    
-    # Obtener citas prioritarias existentes en este mes
-    citas_prioritarias_mes = Appointment.objects.filter(
-        fecha_cita__year=anio_actual,
-        fecha_cita__month=mes_actual,
-        tipo_cita='prioritaria'
-    )
-    
-    # Crear diccionario con días que tienen citas
-    dias_con_citas = {}
-    for cita in citas_prioritarias_mes:
-        dia = cita.fecha_cita.day
-        if dia not in dias_con_citas:
-            dias_con_citas[dia] = 0
-        dias_con_citas[dia] += 1
-    
-    # Generar estructura de días del mes
-    dias_del_mes = []
-    for dia in range(1, 32):
-        try:
-            fecha = date(anio_actual, mes_actual, dia)
-            dia_info = {
-                'numero': dia,
-                'nombre_dia': ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'][fecha.weekday()],
-                'citas': dias_con_citas.get(dia, 0),
-                'es_pasado': fecha < timezone.now().date(),
-                'esta_disponible': dia in fechas_disponibles,
-                'capacidad_info': fechas_disponibles.get(dia, None)
-            }
-            dias_del_mes.append(dia_info)
-        except ValueError:
-            break
-    
-    # Obtener capacidad máxima actual (del primer día disponible o default)
-    capacidad_actual = 2
-    if dias_disponibles_bd.exists():
-        capacidad_actual = dias_disponibles_bd.first().capacidad_maxima
-    
-    contexto = {
-        'dias_del_mes': dias_del_mes,
-        'mes_actual': mes_actual,
-        'anio_actual': anio_actual,
-        'nombre_mes': nombres_meses[mes_actual],
-        'mes_anterior': mes_anterior,
-        'anio_anterior': anio_actual - 1 if mes_anterior == 12 else anio_anterior,
-        'mes_siguiente': mes_siguiente,
-        'anio_siguiente': anio_actual + 1 if mes_siguiente == 1 else anio_siguiente,
-        'tipo_cita': 'prioritaria',
-        'capacidad_actual': capacidad_actual,
-        'titulo_pagina': f'Días Disponibles - Citas Prioritarias - {nombres_meses[mes_actual]} {anio_actual}'
-    }
-    
-    return render(request, 'admin/assign_days.html', contexto)
+    return procesar_asignacion_dias(request, 'prioritaria', 'prioritarias', capacidad_por_defecto=2)
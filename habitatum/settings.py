@@ -119,6 +119,29 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conexiones persistentes: cada petición reutiliza la conexión del
+        # hilo en lugar de abrir una nueva. Con CONN_HEALTH_CHECKS se descarta
+        # la conexión si dejó de funcionar antes de reutilizarla.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+
+# Las vistas guardan consultas en el cache y las señales borran esas entradas
+# al cambiar los modelos. Con LocMemCache (el valor por defecto) cada proceso
+# tiene su propio cache y la invalidación solo llega al proceso que hizo el
+# cambio, así que solo es válido con un único worker. Con varios workers,
+# CACHE_BACKEND y CACHE_LOCATION deben apuntar a un cache compartido, por
+# ejemplo django.core.cache.backends.redis.RedisCache y
+# redis://127.0.0.1:6379 (requiere el paquete redis).
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -167,12 +190,46 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'habitatum3@gmail.com')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', 'qspj cpgo osdk gnhv')
 
+# Tiempo máximo (segundos) de espera al servidor SMTP, para que un servidor
+# lento no bloquee indefinidamente los hilos de notificaciones
+EMAIL_TIMEOUT = 10
+
 # Email del administrador que recibirá las notificaciones
 ADMIN_EMAIL = 'habitatum3@gmail.com'
 
 # Email desde el cual se envían los correos
 DEFAULT_FROM_EMAIL = 'habitatum3@gmail.com'
 
+# Logging: los mensajes de las apps de citas (notificaciones), core y
+# propiedades van a consola. Sin esta configuración los logger.info se descartarían.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'appointments': {
+            'handlers': ['console'],
+            'level': os.environ.get('APPOINTMENTS_LOG_LEVEL', 'INFO'),
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('CORE_LOG_LEVEL', 'INFO'),
+        },
+        'integrations': {
+            'handlers': ['console'],
+            'level': os.environ.get('INTEGRATIONS_LOG_LEVEL', 'INFO'),
+        },
+        'properties': {
+            'handlers': ['console'],
+            'level': os.environ.get('PROPERTIES_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 # URL de redirección después del login
 LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/admin/calendario/'
@@ -190,4 +247,9 @@ GOOGLE_OAUTH_CREDENTIALS = {
             "https://habitatum.wacoding.org/integraciones/google/callback/"
         ]
     }
-}
\ No newline at end of file
+}
+
+# oauthlib rechaza URLs de callback sin HTTPS; solo en desarrollo se permite
+# HTTP (http://127.0.0.1:8000/integraciones/google/callback/)
+if DEBUG:
+    os.environ.setdefault('OAUTHLIB_INSECURE_TRANSPORT', '1')
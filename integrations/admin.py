@@ -4,3 +4,18 @@ from .models import GoogleApiToken
 @admin.register(GoogleApiToken)
 class GoogleApiTokenAdmin(admin.ModelAdmin):
     list_display = ['user', 'fecha_actualizacion']
+    list_select_related = ('user',)
+
+    # Columnas de texto con las credenciales: no se muestran en el listado
+    CAMPOS_CREDENCIALES = ('token', 'refresh_token', 'client_id', 'client_secret', 'scopes')
+
+    def get_queryset(self, request):
+        """
+        En el listado no se leen los tokens ni el client secret; el formulario
+        de edición sí los necesita, así que ahí se cargan completos.
+        """
+        queryset = super().get_queryset(request)
+        resolver_match = request.resolver_match
+        if resolver_match and resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.defer(*self.CAMPOS_CREDENCIALES)
+        return queryset
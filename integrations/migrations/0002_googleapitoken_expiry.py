@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googleapitoken',
+            name='expiry',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Expiración del Token'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_googleapitoken_expiry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='googleapitoken',
+            name='refresh_token',
+            field=models.CharField(max_length=512, verbose_name='Token de Actualización'),
+        ),
+        migrations.AlterField(
+            model_name='googleapitoken',
+            name='token',
+            field=models.CharField(max_length=2048, verbose_name='Token de Acceso'),
+        ),
+    ]
@@ -9,12 +9,15 @@ class GoogleApiToken(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Usuario Administrador"
     )
-    token = models.TextField(verbose_name="Token de Acceso")
-    refresh_token = models.TextField(verbose_name="Token de Actualización")
+    # Google documenta un máximo de 2048 bytes para el token de acceso y de
+    # 512 para el de actualización
+    token = models.CharField(max_length=2048, verbose_name="Token de Acceso")
+    refresh_token = models.CharField(max_length=512, verbose_name="Token de Actualización")
     token_uri = models.CharField(max_length=300, verbose_name="URI del Token")
     client_id = models.CharField(max_length=300, verbose_name="Client ID")
     client_secret = models.CharField(max_length=300, verbose_name="Client Secret")
     scopes = models.TextField(verbose_name="Scopes (permisos)")
+    expiry = models.DateTimeField(null=True, blank=True, verbose_name="Expiración del Token")
     
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
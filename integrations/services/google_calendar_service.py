@@ -6,13 +6,179 @@ eventos en Google Calendar de forma segura y eficiente.
 """
 
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from django.conf import settings
 from datetime import datetime, timedelta
-import pytz
+import httplib2
+import logging
+import threading
+import time
+from zoneinfo import ZoneInfo
 
+from django.contrib.auth.models import User
+
+from appointments.models import Appointment
+from appointments.reintentos import INTENTOS_MAXIMOS, calcular_espera_backoff
 from ..models import GoogleApiToken
+from ..utils.oauth_helpers import expiry_desde_db, verificar_credenciales_validas
+
+
+logger = logging.getLogger(__name__)
+
+# Máximo de peticiones por batch recomendado por la API de Google Calendar
+TAMANO_MAXIMO_BATCH = 50
+
+# Códigos HTTP de la API de Google que se reintentan con backoff
+CODIGOS_HTTP_TRANSITORIOS = (429, 500, 502, 503, 504)
+
+# Zona horaria de los eventos en Google Calendar
+NOMBRE_ZONA_HORARIA_MEXICO = 'America/Mexico_City'
+ZONA_HORARIA_MEXICO = ZoneInfo(NOMBRE_ZONA_HORARIA_MEXICO)
+
+# Datos del evento de Google Calendar según el tipo de cita
+DATOS_TIPO_CITA = {
+    'prioritaria': {
+        'duracion_minutos': 90,
+        'color': '11',  # Rojo
+        'emoji': '💼',
+        'etiqueta': 'Cita Prioritaria (con Asesoría Crediticia)',
+    },
+    'normal': {
+        'duracion_minutos': 45,
+        'color': '9',  # Azul
+        'emoji': '📅',
+        'etiqueta': 'Cita Normal',
+    },
+}
+
+# Tiempo máximo de espera de cada petición HTTP a la API de Google
+TIEMPO_ESPERA_HTTP_GOOGLE = 30  # segundos
+
+# Servicios de Google Calendar ya construidos en el hilo actual:
+# {id del usuario: (token de la base de datos, credenciales, servicio)}
+# El transporte httplib2 de cada servicio no es thread-safe, así que cada hilo
+# del pool guarda sus propios servicios en un threading.local (que desaparece
+# con el hilo) en lugar de compartir uno por usuario. Como el servicio se
+# reutiliza, su httplib2.Http mantiene abierta la conexión TLS con Google
+# entre llamadas.
+_hilo_local = threading.local()
+
+# Credenciales leídas de la base de datos: {id del usuario: (token, credenciales, vence)}
+# Cada entrada vive hasta MARGEN_EXPIRACION_CREDENCIALES segundos antes de que
+# expire el token, y como máximo TIEMPO_CACHE_CREDENCIALES segundos.
+TIEMPO_CACHE_CREDENCIALES = 3300  # segundos
+MARGEN_EXPIRACION_CREDENCIALES = 60  # segundos
+_credenciales_google = {}
+_lock_credenciales_google = threading.RLock()
+
+# Usuarios administradores ya leídos: {id del usuario: User}. Solo se usan
+# para identificar al usuario (su id y su nombre en los logs)
+_usuarios_admin = {}
+_lock_usuarios_admin = threading.Lock()
+
+# Columnas de GoogleApiToken que se necesitan para construir las credenciales.
+# fecha_actualizacion es la marca de vigencia de las entradas en memoria
+CAMPOS_CREDENCIALES = (
+    'token', 'refresh_token', 'token_uri', 'client_id', 'client_secret', 'scopes',
+    'expiry', 'fecha_actualizacion',
+)
+
+
+def construir_credenciales_google(token_google):
+    """
+    Construye las credenciales OAuth2 a partir de un registro GoogleApiToken.
+    
+    Se incluye la expiración guardada para que google-auth sepa cuándo el
+    token dejó de ser válido y lo refresque antes de usarlo.
+    
+    Parámetros:
+        token_google: Registro GoogleApiToken
+        
+    Retorna:
+        Credentials: Objeto de credenciales de Google OAuth2
+    """
+    return Credentials(
+        token=token_google.token,
+        refresh_token=token_google.refresh_token,
+        token_uri=token_google.token_uri,
+        client_id=token_google.client_id,
+        client_secret=token_google.client_secret,
+        scopes=token_google.scopes.split(),
+        expiry=expiry_desde_db(token_google.expiry)
+    )
+
+
+def obtener_fecha_token(usuario):
+    """
+    Obtiene la fecha de la última actualización del GoogleApiToken de un usuario.
+    
+    Las credenciales y servicios en memoria son de cada proceso, y
+    invalidar_servicio_calendar() solo limpia los del proceso actual. Al
+    conectar, reconectar o refrescar el token cambia fecha_actualizacion (y al
+    desconectar desaparece el registro), así que comparar esta fecha con la de
+    la entrada guardada detecta en cualquier worker los tokens revocados o
+    reemplazados con una consulta de una sola columna.
+    
+    Parámetros:
+        usuario: Objeto User de Django del administrador
+        
+    Retorna:
+        datetime: Fecha de actualización, o None si el usuario no tiene tokens
+    """
+    return GoogleApiToken.objects.filter(user=usuario).values_list(
+        'fecha_actualizacion', flat=True
+    ).first()
+
+
+def cargar_credenciales_google(usuario, fecha_token=None):
+    """
+    Obtiene el registro GoogleApiToken y las credenciales de un usuario, con cache en memoria.
+    
+    Las credenciales se comparten entre los hilos del proceso; mientras la
+    entrada no venza y el token de la base de datos no haya cambiado, no se
+    vuelven a leer ni construir.
+    
+    Parámetros:
+        usuario: Objeto User de Django del administrador
+        fecha_token: Resultado de obtener_fecha_token() si ya se consultó (opcional)
+        
+    Retorna:
+        tuple: (token_google, credenciales), o (None, None) si el usuario no tiene tokens
+    """
+    if fecha_token is None:
+        fecha_token = obtener_fecha_token(usuario)
+    if fecha_token is None:
+        with _lock_credenciales_google:
+            _credenciales_google.pop(usuario.pk, None)
+        logger.warning("No se encontraron credenciales de Google para el usuario: %s", usuario.username)
+        return None, None
+    
+    with _lock_credenciales_google:
+        entrada = _credenciales_google.get(usuario.pk)
+        if (
+            entrada is not None
+            and entrada[2] > time.monotonic()
+            and entrada[0].fecha_actualizacion == fecha_token
+        ):
+            return entrada[0], entrada[1]
+    
+    token_google = GoogleApiToken.objects.filter(user=usuario).only(*CAMPOS_CREDENCIALES).first()
+    if token_google is None:
+        logger.warning("No se encontraron credenciales de Google para el usuario: %s", usuario.username)
+        return None, None
+    credenciales = construir_credenciales_google(token_google)
+    
+    tiempo_vida = TIEMPO_CACHE_CREDENCIALES
+    if credenciales.expiry is not None:
+        segundos_restantes = (credenciales.expiry - datetime.utcnow()).total_seconds()
+        tiempo_vida = min(tiempo_vida, segundos_restantes - MARGEN_EXPIRACION_CREDENCIALES)
+    
+    if tiempo_vida > 0:
+        with _lock_credenciales_google:
+            _credenciales_google[usuario.pk] = (token_google, credenciales, time.monotonic() + tiempo_vida)
+    return token_google, credenciales
 
 
 def obtener_credenciales_google(usuario):
@@ -24,28 +190,119 @@ def obtener_credenciales_google(usuario):
         
     Retorna:
         Credentials: Objeto de credenciales de Google OAuth2, o None si no existen
+    """
+    return cargar_credenciales_google(usuario)[1]
+
+
+def obtener_servicio_calendar(usuario, fecha_token=None):
+    """
+    Obtiene el servicio de Google Calendar API de un usuario, reutilizándolo entre llamadas.
+    
+    build() procesa el documento de discovery de la API, así que se hace solo
+    la primera vez en cada hilo; las credenciales vienen del cache de
+    cargar_credenciales_google(). Mientras el token de la base de datos no
+    cambie y las credenciales sigan válidas se devuelve el servicio guardado;
+    si expiraron se refrescan (verificar_credenciales_validas guarda el token
+    nuevo en GoogleApiToken) y se reconstruye el servicio.
+    
+    Parámetros:
+        usuario: Objeto User de Django del administrador
+        fecha_token: Resultado de obtener_fecha_token() si ya se consultó (opcional)
         
-    Excepciones:
-        GoogleApiToken.DoesNotExist: Si el usuario no tiene tokens configurados
+    Retorna:
+        Resource: Servicio de Google Calendar API, o None si no hay credenciales válidas
     """
-    try:
-        token_google = GoogleApiToken.objects.get(user=usuario)
-        
-        # Crear credenciales desde los datos almacenados
-        credenciales = Credentials(
-            token=token_google.token,
-            refresh_token=token_google.refresh_token,
-            token_uri=token_google.token_uri,
-            client_id=token_google.client_id,
-            client_secret=token_google.client_secret,
-            scopes=token_google.scopes.split()
-        )
-        
-        return credenciales
-        
-    except GoogleApiToken.DoesNotExist:
-        print(f"No se encontraron credenciales de Google para el usuario: {usuario.username}")
+    servicios = getattr(_hilo_local, 'servicios', None)
+    if servicios is None:
+        servicios = _hilo_local.servicios = {}
+    
+    if fecha_token is None:
+        fecha_token = obtener_fecha_token(usuario)
+    if fecha_token is None:
+        servicios.pop(usuario.pk, None)
+        logger.warning("No se encontraron credenciales de Google para el usuario: %s", usuario.username)
+        return None
+    
+    token_google, credenciales, servicio_calendar = servicios.get(usuario.pk, (None, None, None))
+    if (
+        token_google is not None
+        and token_google.fecha_actualizacion == fecha_token
+        and credenciales.valid
+    ):
+        return servicio_calendar
+    
+    token_google, credenciales = cargar_credenciales_google(usuario, fecha_token)
+    if token_google is None:
         return None
+    
+    if not verificar_credenciales_validas(credenciales, token_google):
+        return None
+    
+    http_autorizado = AuthorizedHttp(
+        credenciales,
+        http=httplib2.Http(timeout=TIEMPO_ESPERA_HTTP_GOOGLE)
+    )
+    servicio_calendar = build(
+        'calendar', 'v3',
+        http=http_autorizado,
+        cache_discovery=False,
+        static_discovery=True
+    )
+    servicios[usuario.pk] = (token_google, credenciales, servicio_calendar)
+    return servicio_calendar
+
+
+def obtener_admin_default_y_fecha_token():
+    """
+    Obtiene el administrador por defecto y la fecha de su token en una sola consulta.
+    
+    El administrador por defecto es el del primer GoogleApiToken. La misma
+    consulta (sin JOIN con auth_user) devuelve la fecha_actualizacion del
+    token, que obtener_servicio_calendar() usa como marca de vigencia en lugar
+    de hacer su propia consulta. El objeto User se guarda por worker; cuál es
+    el administrador se vuelve a leer en cada llamada, así que conectar o
+    desconectar Google Calendar se nota en todos los workers.
+    
+    Retorna:
+        tuple: (User, fecha de actualización del token), o (None, None) si no hay tokens
+    """
+    fila = GoogleApiToken.objects.order_by('pk').values_list('user_id', 'fecha_actualizacion').first()
+    if fila is None:
+        return None, None
+    user_id, fecha_token = fila
+    
+    with _lock_usuarios_admin:
+        usuario = _usuarios_admin.get(user_id)
+    if usuario is None:
+        usuario = User.objects.filter(pk=user_id).only('id', 'username').first()
+        if usuario is None:
+            return None, None
+        with _lock_usuarios_admin:
+            _usuarios_admin[user_id] = usuario
+    return usuario, fecha_token
+
+
+def obtener_usuario_admin_default():
+    """
+    Obtiene el administrador del primer GoogleApiToken, el que se usa cuando no se indica un usuario.
+    
+    Retorna:
+        User: Administrador con tokens de Google, o None si no hay ninguno
+    """
+    return obtener_admin_default_y_fecha_token()[0]
+
+
+def invalidar_servicio_calendar(usuario):
+    """
+    Descarta las credenciales guardadas de un usuario en este proceso.
+    
+    Se llama al desconectar o volver a conectar Google Calendar. Los servicios
+    de cada hilo, y las entradas de los demás workers, se descartan solos en
+    su siguiente uso al ver que cambió la fecha del token (ver
+    obtener_fecha_token).
+    """
+    with _lock_credenciales_google:
+        _credenciales_google.pop(usuario.pk, None)
 
 
 def crear_evento_en_google_calendar(cita, usuario_admin=None):
@@ -70,68 +327,21 @@ def crear_evento_en_google_calendar(cita, usuario_admin=None):
     """
     try:
         # Si no se especifica usuario, usar el primer usuario con tokens
+        fecha_token = None
         if usuario_admin is None:
-            primer_token = GoogleApiToken.objects.first()
-            if not primer_token:
-                print("❌ No hay tokens de Google Calendar configurados")
+            usuario_admin, fecha_token = obtener_admin_default_y_fecha_token()
+            if usuario_admin is None:
+                logger.warning("❌ No hay tokens de Google Calendar configurados")
                 return None
-            usuario_admin = primer_token.user
         
-        # Obtener credenciales
-        credenciales = obtener_credenciales_google(usuario_admin)
-        if not credenciales:
-            print("❌ No se pudieron obtener las credenciales de Google")
+        # Obtener el servicio de Google Calendar
+        servicio_calendar = obtener_servicio_calendar(usuario_admin, fecha_token)
+        if not servicio_calendar:
+            logger.warning("❌ No se pudieron obtener las credenciales de Google")
             return None
         
-        # Construir el servicio de Google Calendar
-        servicio_calendar = build('calendar', 'v3', credentials=credenciales)
-        
-        # Preparar los datos del evento
-        titulo_evento = construir_titulo_evento(cita)
-        descripcion_evento = construir_descripcion_evento(cita)
-        ubicacion_evento = cita.property.ubicacion
-        
-        # Configurar zona horaria de México
-        zona_horaria_mexico = pytz.timezone('America/Mexico_City')
-        
-        # Fecha y hora de inicio
-        fecha_hora_inicio = cita.fecha_cita
-        if fecha_hora_inicio.tzinfo is None:
-            fecha_hora_inicio = zona_horaria_mexico.localize(fecha_hora_inicio)
-        
-        # Duración del evento según tipo de cita
-        if cita.tipo_cita == 'prioritaria':
-            duracion_minutos = 90  # Citas prioritarias: 90 minutos
-        else:
-            duracion_minutos = 45  # Citas normales: 45 minutos
-        
-        fecha_hora_fin = fecha_hora_inicio + timedelta(minutes=duracion_minutos)
-        
         # Construir el cuerpo del evento
-        cuerpo_evento = {
-            'summary': titulo_evento,
-            'description': descripcion_evento,
-            'location': ubicacion_evento,
-            'start': {
-                'dateTime': fecha_hora_inicio.isoformat(),
-                'timeZone': 'America/Mexico_City',
-            },
-            'end': {
-                'dateTime': fecha_hora_fin.isoformat(),
-                'timeZone': 'America/Mexico_City',
-            },
-            'attendees': [
-                {'email': cita.email_cliente},
-            ],
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 24 * 60},  # 1 día antes
-                    {'method': 'popup', 'minutes': 60},       # 1 hora antes
-                ],
-            },
-            'colorId': '11' if cita.tipo_cita == 'prioritaria' else '9',  # Rojo para prioritarias, Azul para normales
-        }
+        cuerpo_evento = construir_cuerpo_evento(cita)
         
         # Crear el evento en Google Calendar
         evento_creado = servicio_calendar.events().insert(
@@ -139,23 +349,232 @@ def crear_evento_en_google_calendar(cita, usuario_admin=None):
             body=cuerpo_evento
         ).execute()
         
-        # Guardar el ID del evento en la base de datos
+        # Guardar solo el ID del evento en la base de datos
         id_evento_google = evento_creado.get('id')
+        Appointment.objects.filter(pk=cita.pk).update(google_event_id=id_evento_google)
         cita.google_event_id = id_evento_google
-        cita.save()
         
-        print(f"✅ Evento creado en Google Calendar: {evento_creado.get('htmlLink')}")
+        logger.info("✅ Evento creado en Google Calendar: %s", evento_creado.get('htmlLink'))
         return id_evento_google
         
     except HttpError as error_http:
-        print(f"❌ Error HTTP al crear evento en Google Calendar: {error_http}")
+        logger.exception("❌ Error HTTP al crear evento en Google Calendar: %s", error_http)
         return None
         
     except Exception as error_general:
-        print(f"❌ Error general al crear evento en Google Calendar: {error_general}")
+        logger.exception("❌ Error general al crear evento en Google Calendar: %s", error_general)
+        return None
+
+
+def es_error_google_transitorio(error):
+    """
+    Indica si un error de la API de Google vale la pena reintentarlo.
+    
+    Solo el límite de peticiones (429) y los errores del servidor (5xx) son
+    transitorios; los errores de autenticación o de petición fallan de inmediato.
+    """
+    return isinstance(error, HttpError) and error.resp.status in CODIGOS_HTTP_TRANSITORIOS
+
+
+def obtener_retry_after(error):
+    """
+    Obtiene los segundos de espera indicados en la cabecera Retry-After.
+    
+    Retorna:
+        int: Segundos a esperar, o None si la cabecera no existe o no es numérica
+    """
+    try:
+        return int(error.resp.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
         return None
 
 
+def obtener_datos_tipo_cita(cita):
+    """
+    Obtiene la duración, color, emoji y etiqueta del evento según el tipo de cita.
+    
+    Un tipo desconocido se trata como cita normal.
+    """
+    return DATOS_TIPO_CITA.get(cita.tipo_cita, DATOS_TIPO_CITA['normal'])
+
+
+def construir_campos_evento(cita):
+    """
+    Construye los campos del evento que dependen de los datos de la cita.
+    
+    Son los que se envían al actualizar un evento con events().patch().
+    
+    Parámetros:
+        cita: Objeto Appointment con la propiedad cargada
+        
+    Retorna:
+        dict: summary, description, location, start y end del evento
+    """
+    # Fecha y hora de inicio
+    fecha_hora_inicio = cita.fecha_cita
+    if fecha_hora_inicio.tzinfo is None:
+        fecha_hora_inicio = fecha_hora_inicio.replace(tzinfo=ZONA_HORARIA_MEXICO)
+    
+    # Duración del evento según tipo de cita
+    duracion_minutos = obtener_datos_tipo_cita(cita)['duracion_minutos']
+    fecha_hora_fin = fecha_hora_inicio + timedelta(minutes=duracion_minutos)
+    
+    return {
+        'summary': construir_titulo_evento(cita),
+        'description': construir_descripcion_evento(cita),
+        'location': cita.property.ubicacion,
+        'start': {
+            'dateTime': fecha_hora_inicio.isoformat(),
+            'timeZone': NOMBRE_ZONA_HORARIA_MEXICO,
+        },
+        'end': {
+            'dateTime': fecha_hora_fin.isoformat(),
+            'timeZone': NOMBRE_ZONA_HORARIA_MEXICO,
+        },
+    }
+
+
+def construir_cuerpo_evento(cita):
+    """
+    Construye el cuerpo del evento de Google Calendar para una cita.
+    
+    Parámetros:
+        cita: Objeto Appointment con la propiedad cargada
+        
+    Retorna:
+        dict: Cuerpo del evento listo para events().insert()
+    """
+    cuerpo_evento = construir_campos_evento(cita)
+    cuerpo_evento.update({
+        'attendees': [
+            {'email': cita.email_cliente},
+        ],
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 24 * 60},  # 1 día antes
+                {'method': 'popup', 'minutes': 60},       # 1 hora antes
+            ],
+        },
+        'colorId': obtener_datos_tipo_cita(cita)['color'],
+    })
+    
+    return cuerpo_evento
+
+
+def crear_eventos_en_google_calendar_batch(citas, usuario_admin=None):
+    """
+    Crea varios eventos en Google Calendar con peticiones batch.
+    
+    En lugar de una petición HTTPS por cita, agrupa hasta
+    TAMANO_MAXIMO_BATCH inserciones en una sola petición multipart al
+    endpoint batch de la API de Calendar. Los IDs de los eventos creados se
+    guardan con un único bulk_update, también si un lote falla.
+    
+    Parámetros:
+        citas: Lista de objetos Appointment (con la propiedad cargada)
+        usuario_admin: Usuario administrador (opcional, usa el primero si no se especifica)
+        
+    Retorna:
+        dict: {id de la cita: ID del evento creado} para las citas que se crearon
+    """
+    if not citas:
+        return {}
+    
+    # Si no se especifica usuario, usar el primer usuario con tokens
+    fecha_token = None
+    if usuario_admin is None:
+        usuario_admin, fecha_token = obtener_admin_default_y_fecha_token()
+        if usuario_admin is None:
+            logger.warning("❌ No hay tokens de Google Calendar configurados")
+            return {}
+    
+    servicio_calendar = obtener_servicio_calendar(usuario_admin, fecha_token)
+    if not servicio_calendar:
+        logger.warning("❌ No se pudieron obtener las credenciales de Google")
+        return {}
+    
+    citas_por_id = {str(cita.pk): cita for cita in citas}
+    eventos_creados = {}
+    
+    try:
+        # Las citas que fallan con un error transitorio se reintentan en un
+        # nuevo batch tras un backoff exponencial; las demás fallan de inmediato
+        pendientes = list(citas_por_id.values())
+        for intento in range(INTENTOS_MAXIMOS):
+            reintentar = []
+            retry_after = None
+            
+            def registrar_respuesta(request_id, respuesta, excepcion):
+                nonlocal retry_after
+                if excepcion is None:
+                    eventos_creados[request_id] = respuesta.get('id')
+                elif es_error_google_transitorio(excepcion):
+                    reintentar.append(citas_por_id[request_id])
+                    retry_after = obtener_retry_after(excepcion) or retry_after
+                else:
+                    logger.error("❌ Error al crear evento para la cita %s: %s", request_id, excepcion)
+            
+            for inicio in range(0, len(pendientes), TAMANO_MAXIMO_BATCH):
+                lote = pendientes[inicio:inicio + TAMANO_MAXIMO_BATCH]
+                batch = servicio_calendar.new_batch_http_request(callback=registrar_respuesta)
+                for cita in lote:
+                    batch.add(
+                        servicio_calendar.events().insert(
+                            calendarId='primary',
+                            body=construir_cuerpo_evento(cita)
+                        ),
+                        request_id=str(cita.pk)
+                    )
+                try:
+                    batch.execute()
+                except HttpError as error_http:
+                    if not es_error_google_transitorio(error_http):
+                        raise
+                    reintentar.extend(lote)
+                    retry_after = obtener_retry_after(error_http) or retry_after
+            
+            if not reintentar:
+                break
+            if intento == INTENTOS_MAXIMOS - 1:
+                logger.error("❌ Se agotaron los reintentos para %s evento(s) de Google Calendar", len(reintentar))
+                break
+            
+            espera = calcular_espera_backoff(intento, retry_after=retry_after)
+            logger.warning("⚠️ %s evento(s) con error transitorio, reintentando en %.1f s", len(reintentar), espera)
+            time.sleep(espera)
+            pendientes = reintentar
+    finally:
+        # Los IDs se guardan aunque un batch falle con un error permanente:
+        # los eventos de los lotes anteriores ya existen en Google, y sin su
+        # ID un nuevo intento los duplicaría
+        citas_actualizadas = guardar_ids_eventos(citas_por_id, eventos_creados)
+    
+    logger.info("✅ %s evento(s) creados en Google Calendar por batch", len(citas_actualizadas))
+    return {cita.pk: cita.google_event_id for cita in citas_actualizadas}
+
+
+def guardar_ids_eventos(citas_por_id, eventos_creados):
+    """
+    Guarda los IDs de los eventos creados en sus citas con un solo bulk_update.
+    
+    Parámetros:
+        citas_por_id: dict {request_id: Appointment} del batch
+        eventos_creados: dict {request_id: ID del evento creado}
+        
+    Retorna:
+        list: Citas actualizadas
+    """
+    citas_actualizadas = []
+    for request_id, id_evento in eventos_creados.items():
+        cita = citas_por_id[request_id]
+        cita.google_event_id = id_evento
+        citas_actualizadas.append(cita)
+    if citas_actualizadas:
+        Appointment.objects.bulk_update(citas_actualizadas, ['google_event_id'])
+    return citas_actualizadas
+
+
 def construir_titulo_evento(cita):
     """
     Construye el título del evento para Google Calendar.
@@ -166,7 +585,7 @@ def construir_titulo_evento(cita):
     Retorna:
         str: Título formateado del evento
     """
-    tipo_emoji = "💼" if cita.tipo_cita == 'prioritaria' else "📅"
+    tipo_emoji = obtener_datos_tipo_cita(cita)['emoji']
     titulo = f"{tipo_emoji} Cita - {cita.nombre_cliente} - {cita.property.nombre}"
     return titulo
 
@@ -175,15 +594,22 @@ def construir_descripcion_evento(cita):
     """
     Construye la descripción detallada del evento para Google Calendar.
     
+    La descripción se arma con una lista de partes y un solo join; la
+    propiedad debe venir cargada con select_related (ver
+    appointments.tasks.citas_con_propiedad) para no consultarla por cita en
+    el batch.
+    
     Parámetros:
         cita: Objeto Appointment
         
     Retorna:
         str: Descripción formateada del evento en HTML
     """
-    tipo_cita_texto = "Cita Prioritaria (con Asesoría Crediticia)" if cita.tipo_cita == 'prioritaria' else "Cita Normal"
+    propiedad = cita.property
+    es_prioritaria = cita.tipo_cita == 'prioritaria'
+    tipo_cita_texto = obtener_datos_tipo_cita(cita)['etiqueta']
     
-    descripcion = f"""
+    partes = [f"""
 <b>🏠 CITA HABITATUM</b>
 
 <b>Tipo:</b> {tipo_cita_texto}
@@ -194,36 +620,40 @@ def construir_descripcion_evento(cita):
 - Teléfono: {cita.telefono_cliente}
 
 <b>🏘️ PROPIEDAD</b>
-- Nombre: {cita.property.nombre}
-- Ubicación: {cita.property.ubicacion}
-- Tipo: {cita.property.get_tipo_inmueble_display()}
-- Superficie: {cita.property.metros_cuadrados} m²
-- Precio: ${cita.property.precio:,.2f} MXN
-"""
+- Nombre: {propiedad.nombre}
+- Ubicación: {propiedad.ubicacion}
+- Tipo: {propiedad.get_tipo_inmueble_display()}
+- Superficie: {propiedad.metros_cuadrados} m²
+- Precio: ${propiedad.precio:,.2f} MXN
+"""]
     
     # Agregar información financiera para citas prioritarias
-    if cita.tipo_cita == 'prioritaria':
-        descripcion += f"""
+    if es_prioritaria:
+        tipo_credito = cita.get_tipo_credito_display()
+        partes.append(f"""
 <b>💰 INFORMACIÓN FINANCIERA</b>
 - Ingresos mensuales: ${cita.ingresos_mensuales:,.2f} MXN
-- Tipo de crédito: {cita.get_tipo_credito_display()}
+- Tipo de crédito: {tipo_credito}
 
 <b>📌 NOTA:</b> Esta es una cita prioritaria que incluye asesoría crediticia.
-Prepara información sobre opciones de {cita.get_tipo_credito_display().lower()} antes de la reunión.
-"""
+Prepara información sobre opciones de {tipo_credito.lower()} antes de la reunión.
+""")
     
-    descripcion += """
+    partes.append("""
 ---
 <i>Evento creado automáticamente por Habitatum</i>
-"""
+""")
     
-    return descripcion
+    return ''.join(partes)
 
 
 def actualizar_evento_google_calendar(cita):
     """
     Actualiza un evento existente en Google Calendar.
     
+    Se hace con una sola petición events().patch() en lugar de leer el evento
+    completo y reemplazarlo con events().update().
+    
     Parámetros:
         cita: Objeto Appointment con google_event_id válido
         
@@ -231,63 +661,33 @@ def actualizar_evento_google_calendar(cita):
         bool: True si se actualizó correctamente, False en caso contrario
     """
     if not cita.google_event_id:
-        print("⚠️ La cita no tiene un evento asociado en Google Calendar")
+        logger.warning("⚠️ La cita no tiene un evento asociado en Google Calendar")
         return False
     
     try:
         # Obtener credenciales
-        primer_token = GoogleApiToken.objects.first()
-        if not primer_token:
+        usuario_admin, fecha_token = obtener_admin_default_y_fecha_token()
+        if usuario_admin is None:
             return False
         
-        credenciales = obtener_credenciales_google(primer_token.user)
-        if not credenciales:
+        servicio_calendar = obtener_servicio_calendar(usuario_admin, fecha_token)
+        if not servicio_calendar:
             return False
         
-        # Construir servicio
-        servicio_calendar = build('calendar', 'v3', credentials=credenciales)
-        
-        # Obtener evento existente
-        evento_existente = servicio_calendar.events().get(
-            calendarId='primary',
-            eventId=cita.google_event_id
-        ).execute()
-        
-        # Actualizar campos
-        evento_existente['summary'] = construir_titulo_evento(cita)
-        evento_existente['description'] = construir_descripcion_evento(cita)
-        evento_existente['location'] = cita.property.ubicacion
-        
-        # Actualizar fecha si cambió
-        zona_horaria_mexico = pytz.timezone('America/Mexico_City')
-        fecha_hora_inicio = cita.fecha_cita
-        if fecha_hora_inicio.tzinfo is None:
-            fecha_hora_inicio = zona_horaria_mexico.localize(fecha_hora_inicio)
-        
-        duracion_minutos = 90 if cita.tipo_cita == 'prioritaria' else 45
-        fecha_hora_fin = fecha_hora_inicio + timedelta(minutes=duracion_minutos)
-        
-        evento_existente['start'] = {
-            'dateTime': fecha_hora_inicio.isoformat(),
-            'timeZone': 'America/Mexico_City',
-        }
-        evento_existente['end'] = {
-            'dateTime': fecha_hora_fin.isoformat(),
-            'timeZone': 'America/Mexico_City',
-        }
-        
-        # Actualizar evento
-        evento_actualizado = servicio_calendar.events().update(
+        # Enviar solo los campos que dependen de la cita: patch los combina con
+        # el evento existente, así que no hace falta leerlo antes
+        evento_actualizado = servicio_calendar.events().patch(
             calendarId='primary',
             eventId=cita.google_event_id,
-            body=evento_existente
+            body=construir_campos_evento(cita),
+            fields='htmlLink'
         ).execute()
         
-        print(f"✅ Evento actualizado en Google Calendar: {evento_actualizado.get('htmlLink')}")
+        logger.info("✅ Evento actualizado en Google Calendar: %s", evento_actualizado.get('htmlLink'))
         return True
         
     except HttpError as error:
-        print(f"❌ Error al actualizar evento en Google Calendar: {error}")
+        logger.exception("❌ Error al actualizar evento en Google Calendar: %s", error)
         return False
 
 
@@ -302,36 +702,33 @@ def eliminar_evento_google_calendar(cita):
         bool: True si se eliminó correctamente, False en caso contrario
     """
     if not cita.google_event_id:
-        print("⚠️ La cita no tiene un evento asociado en Google Calendar")
+        logger.warning("⚠️ La cita no tiene un evento asociado en Google Calendar")
         return False
     
     try:
         # Obtener credenciales
-        primer_token = GoogleApiToken.objects.first()
-        if not primer_token:
+        usuario_admin, fecha_token = obtener_admin_default_y_fecha_token()
+        if usuario_admin is None:
             return False
         
-        credenciales = obtener_credenciales_google(primer_token.user)
-        if not credenciales:
+        servicio_calendar = obtener_servicio_calendar(usuario_admin, fecha_token)
+        if not servicio_calendar:
             return False
         
-        # Construir servicio
-        servicio_calendar = build('calendar', 'v3', credentials=credenciales)
-        
         # Eliminar evento
         servicio_calendar.events().delete(
             calendarId='primary',
             eventId=cita.google_event_id
         ).execute()
         
-        print(f"✅ Evento eliminado de Google Calendar: {cita.google_event_id}")
+        logger.info("✅ Evento eliminado de Google Calendar: %s", cita.google_event_id)
         
-        # Limpiar el ID del evento en la base de datos
+        # Limpiar solo el ID del evento en la base de datos
+        Appointment.objects.filter(pk=cita.pk).update(google_event_id=None)
         cita.google_event_id = None
-        cita.save()
         
         return True
         
     except HttpError as error:
-        print(f"❌ Error al eliminar evento de Google Calendar: {error}")
+        logger.exception("❌ Error al eliminar evento de Google Calendar: %s", error)
         return False
\ No newline at end of file
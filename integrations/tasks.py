@@ -0,0 +1,46 @@
+"""
+Tareas en segundo plano de la app de integraciones.
+
+Al desconectar Google Calendar el token se revoca en Google desde el mismo
+pool de hilos que las notificaciones de citas (ver appointments/tasks.py),
+para que la vista no espere la respuesta del endpoint de revocación.
+"""
+
+import logging
+
+from appointments.tasks import encolar_tarea
+
+from .utils.oauth_helpers import revocar_token_google
+
+
+logger = logging.getLogger(__name__)
+
+
+def programar_revocacion_token(token):
+    """
+    Encola la revocación de un token de Google.
+    
+    La tarea se ejecuta cuando la transacción actual se confirma, es decir,
+    después de que el token se eliminó de la base de datos.
+    
+    Parámetros:
+        token: Refresh token del usuario que desconectó Google Calendar
+    """
+    if token:
+        encolar_tarea(revocar_token, token)
+
+
+def revocar_token(token):
+    """
+    Tarea: revoca el token en Google.
+    
+    Un error de red se registra; el token ya no existe en la base de datos,
+    así que la aplicación no vuelve a usarlo aunque la revocación falle.
+    
+    Parámetros:
+        token: Refresh token a revocar
+    """
+    try:
+        revocar_token_google(token)
+    except Exception:
+        logger.exception("Error al revocar el token de Google Calendar")
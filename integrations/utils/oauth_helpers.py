@@ -5,18 +5,58 @@ Proporciona funciones auxiliares para facilitar la autenticación
 y manejo de tokens de Google Calendar.
 """
 
+import logging
+from datetime import timezone as dt_timezone
+
+import requests
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
+
+from appointments.reintentos import reintentar_con_backoff
+
+from ..models import GoogleApiToken
+
+
+logger = logging.getLogger(__name__)
+
+# Permisos que se solicitan a Google: crear y modificar eventos del calendario
+SCOPES_GOOGLE_CALENDAR = ['https://www.googleapis.com/auth/calendar.events']
+
+# Transporte HTTP compartido para refrescar tokens: la sesión de requests
+# mantiene viva la conexión con oauth2.googleapis.com entre refrescos, en
+# lugar de abrir un pool nuevo con cada Request()
+_sesion_oauth = requests.Session()
+_sesion_oauth.mount('https://', requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8))
+_transporte_oauth = Request(session=_sesion_oauth)
+
+# Endpoint de Google para revocar tokens OAuth2
+URL_REVOCAR_TOKEN_GOOGLE = 'https://oauth2.googleapis.com/revoke'
+TIEMPO_ESPERA_REVOCACION = 30  # segundos
 
+# Intercambio del código de autorización: el usuario espera en el callback,
+# así que se hacen pocos intentos y la espera entre ellos (incluido un
+# Retry-After) se limita a unos segundos. Las respuestas con estos códigos
+# HTTP (límite de peticiones o servidor saturado) se reintentan
+INTENTOS_INTERCAMBIO_TOKEN = 3
+ESPERA_MAXIMA_INTERCAMBIO_TOKEN = 5  # segundos
+CODIGOS_HTTP_TOKEN_TRANSITORIOS = (429, 500, 502, 503, 504)
 
-def crear_flujo_oauth_google(request):
+
+def crear_flujo_oauth_google(request, state=None):
     """
-    Crea un objeto Flow para iniciar el proceso de autorización OAuth2 con Google.
+    Crea un objeto Flow para el proceso de autorización OAuth2 con Google.
+    
+    Lo usan tanto la vista que inicia la autorización como el callback; solo
+    el state y la URL de callback cambian entre peticiones. Cada petición
+    necesita su propio Flow porque guarda la sesión OAuth2 y los tokens.
     
     Parámetros:
         request: Objeto HttpRequest de Django para construir URL de callback
+        state: Token de estado guardado en la sesión (solo en el callback)
         
     Retorna:
         Flow: Objeto Flow configurado para OAuth2
@@ -27,8 +67,9 @@ def crear_flujo_oauth_google(request):
     # Crear el flujo OAuth2
     flujo_oauth = Flow.from_client_config(
         settings.GOOGLE_OAUTH_CREDENTIALS,
-        scopes=['https://www.googleapis.com/auth/calendar.events'],
-        redirect_uri=url_callback
+        scopes=SCOPES_GOOGLE_CALENDAR,
+        redirect_uri=url_callback,
+        state=state
     )
     
     return flujo_oauth
@@ -53,28 +94,94 @@ def obtener_url_autorizacion_google(flujo_oauth):
     return url_autorizacion, estado
 
 
-def intercambiar_codigo_por_tokens(flujo_oauth, url_respuesta_completa):
+def intercambiar_codigo_por_tokens(flujo_oauth, url_respuesta_completa, timeout=None):
     """
     Intercambia el código de autorización por tokens de acceso.
     
+    Los errores transitorios (conexión, timeout, 429 o 5xx) se reintentan con
+    backoff exponencial, respetando el Retry-After que indique Google.
+    
     Parámetros:
         flujo_oauth: Objeto Flow configurado
         url_respuesta_completa: URL completa de respuesta con el código
+        timeout: Segundos máximos de espera por cada petición (opcional)
         
     Retorna:
         Credentials: Credenciales de Google OAuth2 con los tokens
     """
-    flujo_oauth.fetch_token(authorization_response=url_respuesta_completa)
+    flujo_oauth.oauth2session.register_compliance_hook(
+        'access_token_response', _rechazar_respuesta_token_transitoria
+    )
+    reintentar_con_backoff(
+        flujo_oauth.fetch_token,
+        authorization_response=url_respuesta_completa,
+        timeout=timeout,
+        es_transitorio=es_error_token_transitorio,
+        intentos=INTENTOS_INTERCAMBIO_TOKEN,
+        obtener_retry_after=obtener_retry_after_token,
+        espera_maxima=ESPERA_MAXIMA_INTERCAMBIO_TOKEN,
+    )
     credenciales = flujo_oauth.credentials
     return credenciales
 
 
-def verificar_credenciales_validas(credenciales):
+def _rechazar_respuesta_token_transitoria(respuesta):
+    """
+    Hook de requests-oauthlib para la respuesta del endpoint de tokens.
+    
+    Sin este hook, una respuesta 429 o 5xx se intentaría leer como token y
+    fallaría con un error de OAuth sin código HTTP; así se convierte en un
+    requests.HTTPError que conserva la respuesta y su cabecera Retry-After.
+    """
+    if respuesta.status_code in CODIGOS_HTTP_TOKEN_TRANSITORIOS:
+        raise requests.HTTPError(
+            f"Respuesta {respuesta.status_code} del endpoint de tokens de Google",
+            response=respuesta
+        )
+    return respuesta
+
+
+def es_error_token_transitorio(error):
+    """
+    Indica si un error al intercambiar el código vale la pena reintentarlo.
+    
+    Son transitorios los errores de conexión, los timeouts y las respuestas
+    con código en CODIGOS_HTTP_TOKEN_TRANSITORIOS. Los errores de OAuth
+    (código inválido o ya usado) son permanentes.
+    """
+    if isinstance(error, requests.HTTPError):
+        return (
+            error.response is not None
+            and error.response.status_code in CODIGOS_HTTP_TOKEN_TRANSITORIOS
+        )
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def obtener_retry_after_token(error):
+    """
+    Obtiene los segundos de espera indicados en la cabecera Retry-After.
+    
+    Retorna:
+        int: Segundos a esperar, o None si la cabecera no existe o no es numérica
+    """
+    try:
+        return int(error.response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def verificar_credenciales_validas(credenciales, token_google=None):
     """
     Verifica si las credenciales de Google son válidas y no han expirado.
     
+    Si expiraron se refrescan, y cuando se recibe el registro GoogleApiToken
+    el token nuevo y su expiración se guardan en la base de datos; así las
+    siguientes operaciones parten de un token vigente en lugar de volver a
+    refrescarlo cada vez.
+    
     Parámetros:
         credenciales: Objeto Credentials de Google
+        token_google: Registro GoogleApiToken de las credenciales (opcional)
         
     Retorna:
         bool: True si las credenciales son válidas, False en caso contrario
@@ -86,17 +193,85 @@ def verificar_credenciales_validas(credenciales):
         if credenciales.expired and credenciales.refresh_token:
             # Intentar refrescar el token
             try:
-                from google.auth.transport.requests import Request
-                credenciales.refresh(Request())
-                return True
+                credenciales.refresh(_transporte_oauth)
             except Exception as error:
-                print(f"❌ Error al refrescar token: {error}")
+                logger.exception("❌ Error al refrescar token: %s", error)
                 return False
+            
+            if token_google is not None:
+                # El registro en memoria se actualiza igual que la base de
+                # datos: su fecha_actualizacion es la marca con la que el
+                # cache de credenciales detecta tokens reemplazados
+                token_google.token = credenciales.token
+                token_google.expiry = expiry_para_db(credenciales.expiry)
+                token_google.fecha_actualizacion = timezone.now()
+                GoogleApiToken.objects.filter(pk=token_google.pk).update(
+                    token=token_google.token,
+                    expiry=token_google.expiry,
+                    fecha_actualizacion=token_google.fecha_actualizacion
+                )
+            return True
         return False
     
     return True
 
 
+def revocar_token_google(token):
+    """
+    Revoca un token OAuth2 en Google.
+    
+    Revocar el refresh token también invalida los access tokens emitidos con
+    él, así que la aplicación deja de tener acceso al calendario del usuario.
+    
+    Parámetros:
+        token: Refresh token (o access token) a revocar
+        
+    Retorna:
+        bool: True si Google aceptó la revocación, False en caso contrario
+    """
+    respuesta = _sesion_oauth.post(
+        URL_REVOCAR_TOKEN_GOOGLE,
+        data={'token': token},
+        timeout=TIEMPO_ESPERA_REVOCACION
+    )
+    if respuesta.status_code != 200:
+        logger.warning("⚠️ Google rechazó la revocación del token (HTTP %s)", respuesta.status_code)
+        return False
+    return True
+
+
+def expiry_para_db(expiry):
+    """
+    Convierte la expiración de unas credenciales en datetime para guardar en la base de datos.
+    
+    google-auth maneja la expiración como datetime naive en UTC.
+    
+    Parámetros:
+        expiry: datetime naive en UTC, o None
+        
+    Retorna:
+        datetime: datetime aware en UTC, o None
+    """
+    if expiry is None:
+        return None
+    return timezone.make_aware(expiry, dt_timezone.utc)
+
+
+def expiry_desde_db(expiry):
+    """
+    Convierte la expiración guardada en la base de datos al formato de google-auth.
+    
+    Parámetros:
+        expiry: datetime aware, o None
+        
+    Retorna:
+        datetime: datetime naive en UTC, o None
+    """
+    if expiry is None:
+        return None
+    return timezone.make_naive(expiry, dt_timezone.utc)
+
+
 def formatear_scopes_para_db(lista_scopes):
     """
     Convierte una lista de scopes en string para guardar en la base de datos.
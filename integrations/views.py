@@ -1,13 +1,60 @@
-import os
-os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'  # IMPORTANTE: Permite OAuth sobre HTTP en desarrollo
+import logging
 
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
-from django.urls import reverse
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from .models import GoogleApiToken
+from .services.google_calendar_service import TIEMPO_ESPERA_HTTP_GOOGLE, invalidar_servicio_calendar
+from .tasks import programar_revocacion_token
+from .utils.oauth_helpers import crear_flujo_oauth_google, expiry_para_db, intercambiar_codigo_por_tokens
+
+
+logger = logging.getLogger(__name__)
+
+# Tiempo (segundos) que se conserva en cache el token mostrado en la
+# configuración. Conectar o desconectar Google Calendar invalida la entrada.
+TIEMPO_CACHE_TOKEN_CONFIGURACION = 120
+
+# Valor por defecto de cache.get() para distinguir "no está en cache" de
+# "el usuario no tiene token" (None)
+_SIN_CACHE = object()
+
+
+def clave_cache_token_configuracion(usuario_id):
+    """
+    Construye la clave de cache del token que muestra la configuración de integraciones.
+    """
+    return f'google-token-configuracion:{usuario_id}'
+
+
+def obtener_token_configuracion(usuario):
+    """
+    Obtiene el GoogleApiToken del usuario para la página de configuración, con cache.
+    
+    La plantilla solo muestra la fecha de actualización, así que los tokens no
+    se leen. También se guarda en cache que el usuario no tiene token.
+    
+    Parámetros:
+        usuario: Objeto User de Django del usuario autenticado
+        
+    Retorna:
+        GoogleApiToken: Token del usuario, o None si no ha conectado Google Calendar
+    """
+    clave = clave_cache_token_configuracion(usuario.pk)
+    google_token = cache.get(clave, _SIN_CACHE)
+    
+    if google_token is _SIN_CACHE:
+        google_token = GoogleApiToken.objects.filter(
+            user=usuario
+        ).only('fecha_actualizacion').first()
+        cache.set(clave, google_token, TIEMPO_CACHE_TOKEN_CONFIGURACION)
+    
+    return google_token
 
 
 @login_required(login_url='dashboard:login')
@@ -24,12 +71,8 @@ def integration_settings_view(request):
     Verifica si existe un token de Google Calendar para el usuario actual.
     """
     # Verificar si el usuario tiene Google Calendar conectado
-    try:
-        google_token = GoogleApiToken.objects.get(user=request.user)
-        google_conectado = True
-    except GoogleApiToken.DoesNotExist:
-        google_token = None
-        google_conectado = False
+    google_token = obtener_token_configuracion(request.user)
+    google_conectado = google_token is not None
     
     contexto = {
         'google_conectado': google_conectado,
@@ -63,8 +106,6 @@ def google_authorize_view(request):
     6. Descargar archivo JSON y agregar credenciales a settings.py
     """
     try:
-        from google_auth_oauthlib.flow import Flow
-        
         # Verificar credenciales
         if not hasattr(settings, 'GOOGLE_OAUTH_CREDENTIALS'):
             messages.error(
@@ -73,16 +114,9 @@ def google_authorize_view(request):
             )
             return redirect('integrations:settings')
         
-        # Construir URI de redirección
-        redirect_uri = request.build_absolute_uri(reverse('integrations:google_callback'))
-        print(f"🔗 Redirect URI: {redirect_uri}")  # Para debugging
-        
         # Crear flujo OAuth2
-        flow = Flow.from_client_config(
-            settings.GOOGLE_OAUTH_CREDENTIALS,
-            scopes=['https://www.googleapis.com/auth/calendar.events'],
-            redirect_uri=redirect_uri
-        )
+        flow = crear_flujo_oauth_google(request)
+        logger.debug("🔗 Redirect URI: %s", flow.redirect_uri)
         
         # Generar URL de autorización
         authorization_url, state = flow.authorization_url(
@@ -94,21 +128,13 @@ def google_authorize_view(request):
         # Guardar state en sesión
         request.session['oauth_state'] = state
         
-        print(f"✅ URL de autorización generada: {authorization_url}")  # Para debugging
+        logger.debug("✅ URL de autorización generada: %s", authorization_url)
         
         # Redirigir a Google
         return redirect(authorization_url)
     
-    except ImportError:
-        messages.error(
-            request,
-            'Las librerías de Google OAuth2 no están instaladas. '
-            'Ejecuta: pip install google-auth-oauthlib google-auth-httplib2 google-api-python-client'
-        )
-        return redirect('integrations:settings')
-    
     except Exception as e:
-        print(f"❌ Error en google_authorize_view: {e}")  # Para debugging
+        logger.exception("❌ Error en google_authorize_view: %s", e)
         messages.error(
             request,
             f'Error al iniciar la autorización de Google: {str(e)}'
@@ -135,8 +161,6 @@ def google_callback_view(request):
     - error: Si el usuario rechazó la autorización
     """
     try:
-        from google_auth_oauthlib.flow import Flow
-        
         # Verificar si hubo error
         if 'error' in request.GET:
             messages.warning(
@@ -154,38 +178,63 @@ def google_callback_view(request):
             )
             return redirect('integrations:settings')
         
-        # Construir URI de redirección
-        redirect_uri = request.build_absolute_uri(reverse('integrations:google_callback'))
-        
         # Crear flujo OAuth2
-        flow = Flow.from_client_config(
-            settings.GOOGLE_OAUTH_CREDENTIALS,
-            scopes=['https://www.googleapis.com/auth/calendar.events'],
-            redirect_uri=redirect_uri,
-            state=state
+        flow = crear_flujo_oauth_google(request, state=state)
+        
+        # Intercambiar código por tokens (con tiempo máximo de espera para
+        # no dejar el worker bloqueado si el endpoint de Google no responde,
+        # y reintentos con backoff ante errores transitorios)
+        credentials = intercambiar_codigo_por_tokens(
+            flow,
+            request.build_absolute_uri(),
+            timeout=TIEMPO_ESPERA_HTTP_GOOGLE
         )
         
-        # Intercambiar código por tokens
-        flow.fetch_token(authorization_response=request.build_absolute_uri())
-        
-        # Obtener credenciales
-        credentials = flow.credentials
-        
-        print(f"✅ Token obtenido correctamente")  # Para debugging
-        print(f"🔑 Access token: {credentials.token[:20]}...")  # Primeros 20 caracteres
-        
-        # Guardar en base de datos
-        google_token, created = GoogleApiToken.objects.update_or_create(
-            user=request.user,
-            defaults={
-                'token': credentials.token,
-                'refresh_token': credentials.refresh_token,
-                'token_uri': credentials.token_uri,
-                'client_id': credentials.client_id,
-                'client_secret': credentials.client_secret,
-                'scopes': ' '.join(credentials.scopes),
-            }
+        logger.info("✅ Token de Google Calendar obtenido para el usuario: %s", request.user.username)
+        
+        # Sin refresh token la integración dejaría de funcionar al expirar el
+        # token de acceso (y la columna no admite NULL)
+        if not credentials.refresh_token:
+            logger.error("❌ Google no devolvió refresh token para el usuario: %s", request.user.username)
+            del request.session['oauth_state']
+            messages.error(
+                request,
+                'Google no envió un token de actualización. Quita el acceso de Habitatum '
+                'en tu cuenta de Google e intenta conectar de nuevo.'
+            )
+            return redirect('integrations:settings')
+        
+        # Guardar en base de datos: al reconectar, la fila ya existe y basta
+        # un UPDATE; solo la primera conexión hace además el INSERT.
+        # update() no aplica auto_now, así que la fecha se asigna aquí
+        datos_token = {
+            'token': credentials.token,
+            'refresh_token': credentials.refresh_token,
+            'token_uri': credentials.token_uri,
+            'client_id': credentials.client_id,
+            'client_secret': credentials.client_secret,
+            'scopes': ' '.join(credentials.scopes),
+            'expiry': expiry_para_db(credentials.expiry),
+        }
+        created = not GoogleApiToken.objects.filter(user=request.user).update(
+            fecha_actualizacion=timezone.now(), **datos_token
         )
+        if created:
+            try:
+                with transaction.atomic():
+                    GoogleApiToken.objects.create(user=request.user, **datos_token)
+            except IntegrityError:
+                # Otro callback del mismo usuario creó la fila entre el
+                # UPDATE y el INSERT; si tampoco hay fila que actualizar, el
+                # error no fue esa carrera
+                actualizadas = GoogleApiToken.objects.filter(user=request.user).update(
+                    fecha_actualizacion=timezone.now(), **datos_token
+                )
+                if not actualizadas:
+                    raise
+                created = False
+        invalidar_servicio_calendar(request.user)
+        cache.delete(clave_cache_token_configuracion(request.user.pk))
         
         # Limpiar state de sesión
         del request.session['oauth_state']
@@ -204,7 +253,7 @@ def google_callback_view(request):
         return redirect('integrations:settings')
     
     except Exception as e:
-        print(f"❌ Error en google_callback_view: {e}")  # Para debugging
+        logger.exception("❌ Error en google_callback_view: %s", e)
         messages.error(
             request,
             f'Error al conectar con Google Calendar: {str(e)}'
@@ -217,8 +266,8 @@ def google_disconnect_view(request):
     """
     Vista para desconectar Google Calendar.
     
-    Elimina los tokens almacenados de Google Calendar.
-    Después de esto, las citas ya no se crearán en Google Calendar
+    Elimina los tokens almacenados de Google Calendar y los revoca en Google
+    en segundo plano. Después de esto, las citas ya no se crearán en Google Calendar
     hasta que se vuelva a conectar.
     
     Requiere confirmación mediante POST para evitar desconexiones accidentales.
@@ -227,6 +276,9 @@ def google_disconnect_view(request):
         try:
             google_token = GoogleApiToken.objects.get(user=request.user)
             google_token.delete()
+            invalidar_servicio_calendar(request.user)
+            cache.delete(clave_cache_token_configuracion(request.user.pk))
+            programar_revocacion_token(google_token.refresh_token)
             
             messages.success(
                 request,
@@ -15,4 +15,20 @@ class PropertyAdmin(admin.ModelAdmin):
 @admin.register(PropertyImage)
 class PropertyImageAdmin(admin.ModelAdmin):
     list_display = ['property', 'orden']
-    list_filter = ['property']
+    list_select_related = ('property',)
+    # Un list_filter por propiedad pintaría todas las propiedades en cada
+    # carga del listado; se busca por nombre y se elige con autocompletado
+    search_fields = ['property__nombre']
+    autocomplete_fields = ['property']
+    list_per_page = 50
+
+    def get_queryset(self, request):
+        """
+        En el listado solo se leen el orden y los campos que usa el __str__ de
+        la propiedad; el formulario de edición carga la imagen completa.
+        """
+        queryset = super().get_queryset(request)
+        resolver_match = request.resolver_match
+        if resolver_match and resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.only('id', 'orden', 'property__nombre', 'property__ubicacion')
+        return queryset
@@ -0,0 +1,32 @@
+"""
+Comando para generar las miniaturas que faltan.
+
+Las miniaturas se generan al guardar una propiedad; las propiedades creadas
+antes de que existiera el campo (o cuya generación falló) se completan con:
+
+    python manage.py generar_miniaturas
+"""
+
+from django.core.management.base import BaseCommand
+
+from properties.miniaturas import nombre_miniatura
+from properties.models import Property
+from properties.tasks import generar_miniatura_propiedad
+
+
+class Command(BaseCommand):
+    help = 'Genera la miniatura de las propiedades que no la tienen o la tienen desactualizada'
+
+    def handle(self, *args, **options):
+        propiedades = Property.objects.exclude(imagen_principal='').values_list(
+            'pk', 'imagen_principal', 'miniatura'
+        )
+        
+        total = 0
+        for property_id, imagen, miniatura in propiedades.iterator():
+            if miniatura == nombre_miniatura(imagen):
+                continue
+            generar_miniatura_propiedad(property_id)
+            total += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'Miniaturas procesadas: {total}'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_property_visible_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', 'orden'], name='propimg_prop_orden_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_propertyimage_prop_orden_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_visible', 'tipo_inmueble', '-fecha_creacion'], name='prop_visible_tipo_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-14 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_property_visible_tipo_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='miniatura',
+            field=models.ImageField(blank=True, editable=False, upload_to='properties/miniaturas/', verbose_name='Miniatura'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+"""
+Miniaturas de la imagen principal de las propiedades.
+
+Las tarjetas de la galería, el carousel y las propiedades similares pintan la
+imagen a unos 300-400 px de ancho; servir la foto original (a menudo varios
+MB) desperdicia ancho de banda y tiempo de decodificación en el navegador.
+Al guardar una propiedad se genera en segundo plano una versión WebP
+reducida (ver properties/tasks.py) y las tarjetas la usan en cuanto existe.
+"""
+
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+# Ancho máximo de la miniatura: el doble del ancho de una tarjeta, para
+# pantallas de alta densidad
+ANCHO_MINIATURA = 800
+CALIDAD_MINIATURA = 80
+
+# Carpeta de las miniaturas dentro del storage
+CARPETA_MINIATURAS = 'properties/miniaturas'
+
+
+def nombre_miniatura(nombre_imagen):
+    """
+    Construye la ruta de la miniatura a partir de la ruta de la imagen original.
+
+    La ruta se deriva del nombre completo del archivo original (incluida su
+    extensión), así que dos imágenes distintas nunca comparten miniatura.
+
+    Returns:
+        str: Ruta de la miniatura dentro del storage
+    """
+    return f'{CARPETA_MINIATURAS}/{os.path.basename(nombre_imagen)}.webp'
+
+
+def generar_miniatura(nombre_imagen):
+    """
+    Genera la miniatura WebP de una imagen del storage.
+
+    Se respeta la orientación EXIF de la foto y se conserva la proporción; el
+    recorte a la forma de la tarjeta lo hace el CSS (object-fit: cover). Si la
+    miniatura ya existía se reemplaza.
+
+    Args:
+        nombre_imagen: str - Ruta de la imagen original dentro del storage
+
+    Returns:
+        str: Ruta de la miniatura guardada
+    """
+    with default_storage.open(nombre_imagen, 'rb') as archivo:
+        with Image.open(archivo) as imagen:
+            imagen = ImageOps.exif_transpose(imagen)
+            if imagen.mode not in ('RGB', 'RGBA'):
+                imagen = imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+            imagen.thumbnail((ANCHO_MINIATURA, ANCHO_MINIATURA * 2))
+            contenido = BytesIO()
+            imagen.save(contenido, format='WEBP', quality=CALIDAD_MINIATURA)
+
+    nombre = nombre_miniatura(nombre_imagen)
+    if default_storage.exists(nombre):
+        default_storage.delete(nombre)
+    return default_storage.save(nombre, ContentFile(contenido.getvalue()))
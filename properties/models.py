@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 
+from .miniaturas import nombre_miniatura
+
 class Property(models.Model):
     """Modelo que representa una propiedad inmobiliaria"""
     
@@ -36,6 +38,14 @@ class Property(models.Model):
         upload_to='properties/',
         verbose_name="Imagen Principal"
     )
+    # Versión WebP reducida de la imagen principal para las tarjetas; se
+    # genera en segundo plano al guardar (ver properties/miniaturas.py)
+    miniatura = models.ImageField(
+        upload_to='properties/miniaturas/',
+        blank=True,
+        editable=False,
+        verbose_name="Miniatura"
+    )
     is_visible = models.BooleanField(
         default=True,
         verbose_name="Visible en el sitio público"
@@ -49,9 +59,28 @@ class Property(models.Model):
         verbose_name = "Propiedad"
         verbose_name_plural = "Propiedades"
         ordering = ['-fecha_creacion']
+        # Los listados públicos filtran por is_visible y ordenan por fecha de
+        # creación descendente (carousel y catálogo); el filtro por tipo de la
+        # galería y las propiedades similares del detalle filtran además por
+        # tipo_inmueble
+        indexes = [
+            models.Index(fields=['is_visible', '-fecha_creacion'], name='prop_visible_fecha_idx'),
+            models.Index(fields=['is_visible', 'tipo_inmueble', '-fecha_creacion'], name='prop_visible_tipo_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.ubicacion}"
+    
+    def url_miniatura(self):
+        """
+        URL de la imagen para las tarjetas: la miniatura si ya se generó para
+        la imagen principal actual, si no la imagen principal original.
+        """
+        if not self.imagen_principal:
+            return ''
+        if self.miniatura and self.miniatura.name == nombre_miniatura(self.imagen_principal.name):
+            return self.miniatura.url
+        return self.imagen_principal.url
 
 
 class PropertyImage(models.Model):
@@ -73,6 +102,11 @@ class PropertyImage(models.Model):
         verbose_name = "Imagen de Propiedad"
         verbose_name_plural = "Imágenes de Propiedades"
         ordering = ['orden']
+        # Las imágenes se leen por propiedad en orden, y el orden máximo de una
+        # propiedad se calcula al agregar imágenes nuevas
+        indexes = [
+            models.Index(fields=['property', 'orden'], name='propimg_prop_orden_idx'),
+        ]
     
     def __str__(self):
         return f"Imagen de {self.property.nombre}"
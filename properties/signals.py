@@ -0,0 +1,63 @@
+"""
+Señales de la app de propiedades.
+
+Invalidan los datos cacheados de la galería pública y del detalle de
+propiedades cuando cambia una propiedad o sus imágenes. La invalidación se
+hace al confirmar la transacción: el panel guarda la propiedad y crea sus
+imágenes (con bulk_create, sin señales) en el mismo bloque atómico, y una
+visita intermedia no debe volver a guardar en cache los datos anteriores.
+
+También encolan la miniatura de la imagen principal cuando la propiedad se
+guarda con una imagen que todavía no la tiene.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .miniaturas import nombre_miniatura
+from .models import Property, PropertyImage
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidar_cache_propiedad(sender, instance, **kwargs):
+    """
+    Elimina del cache la galería, los tipos del filtro y el detalle de la propiedad.
+    """
+    from .views import invalidar_cache_galeria
+    property_id = instance.pk
+    transaction.on_commit(lambda: invalidar_cache_galeria(property_id))
+
+
+@receiver(post_save, sender=Property)
+def programar_miniatura_propiedad(sender, instance, **kwargs):
+    """
+    Encola la miniatura si la imagen principal es nueva o cambió.
+    
+    La miniatura de la imagen anterior se quita de la propiedad y su archivo
+    se borra al confirmar la transacción; mientras se genera la nueva, las
+    tarjetas muestran la imagen original.
+    """
+    from .tasks import programar_eliminacion_archivos, programar_miniatura
+    imagen = instance.imagen_principal
+    miniatura_anterior = instance.miniatura.name
+    if imagen and miniatura_anterior == nombre_miniatura(imagen.name):
+        return
+    
+    if miniatura_anterior:
+        Property.objects.filter(pk=instance.pk).update(miniatura='')
+        instance.miniatura = ''
+        programar_eliminacion_archivos([miniatura_anterior])
+    if imagen:
+        programar_miniatura(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=PropertyImage)
+def invalidar_cache_imagenes(sender, instance, **kwargs):
+    """
+    Elimina del cache el detalle de la propiedad de la imagen.
+    """
+    from .views import clave_cache_detalle_propiedad
+    clave = clave_cache_detalle_propiedad(instance.property_id)
+    transaction.on_commit(lambda: cache.delete(clave))
@@ -0,0 +1,97 @@
+"""
+Tareas en segundo plano de la app de propiedades.
+
+Los archivos de imagen de una propiedad eliminada se borran del storage, y
+las miniaturas de la imagen principal se generan, en el mismo pool de hilos
+que las notificaciones de citas (ver appointments/tasks.py), para que la
+respuesta no espere a cada archivo.
+"""
+
+import logging
+
+from django.core.files.storage import default_storage
+
+from appointments.tasks import encolar_tarea
+from core.carrusel import invalidar_carrusel
+
+from .miniaturas import generar_miniatura
+from .models import Property
+
+
+logger = logging.getLogger(__name__)
+
+
+def programar_eliminacion_archivos(nombres_archivos):
+    """
+    Encola el borrado de archivos del storage.
+    
+    La tarea se ejecuta cuando la transacción actual se confirma, así que los
+    archivos solo se borran si los registros que los usaban se eliminaron.
+    
+    Parámetros:
+        nombres_archivos: Lista de rutas de archivo dentro del storage
+    """
+    if nombres_archivos:
+        encolar_tarea(eliminar_archivos, list(nombres_archivos))
+
+
+def eliminar_archivos(nombres_archivos):
+    """
+    Tarea: borra del storage cada archivo de la lista.
+    
+    Un error al borrar un archivo se registra y no impide borrar los demás.
+    
+    Parámetros:
+        nombres_archivos: Lista de rutas de archivo dentro del storage
+    """
+    for nombre in nombres_archivos:
+        try:
+            default_storage.delete(nombre)
+        except Exception:
+            logger.exception("Error al eliminar el archivo %s", nombre)
+
+
+def programar_miniatura(property_id):
+    """
+    Encola la generación de la miniatura de la imagen principal de una propiedad.
+    
+    Parámetros:
+        property_id: ID de la propiedad guardada
+    """
+    encolar_tarea(generar_miniatura_propiedad, property_id)
+
+
+def generar_miniatura_propiedad(property_id):
+    """
+    Tarea: genera la miniatura de la imagen principal y la guarda en la propiedad.
+    
+    La miniatura se asigna con update() filtrando por la imagen usada, así que
+    si la imagen cambió mientras se generaba no se guarda una miniatura vieja
+    (el guardado nuevo ya encoló la suya). update() no dispara señales: el
+    cache de la galería y del carousel se invalida aquí.
+    
+    Parámetros:
+        property_id: ID de la propiedad guardada
+    """
+    nombre_imagen = Property.objects.filter(pk=property_id).values_list(
+        'imagen_principal', flat=True
+    ).first()
+    if not nombre_imagen:
+        return
+    
+    try:
+        nombre = generar_miniatura(nombre_imagen)
+    except Exception:
+        logger.exception("Error al generar la miniatura de %s", nombre_imagen)
+        return
+    
+    actualizadas = Property.objects.filter(
+        pk=property_id, imagen_principal=nombre_imagen
+    ).update(miniatura=nombre)
+    if actualizadas:
+        from .views import invalidar_cache_galeria
+        invalidar_cache_galeria(property_id)
+        invalidar_carrusel()
+    else:
+        # La propiedad cambió de imagen o se eliminó: la miniatura no se usará
+        eliminar_archivos([nombre])
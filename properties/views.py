@@ -1,9 +1,90 @@
 from django.shortcuts import render, get_object_or_404
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
 from django.db.models import Q
 
 from .models import Property, PropertyImage
 
 
+# Tipos de inmueble con propiedades visibles, para el filtro de la galería.
+# Las señales de Property invalidan la entrada (ver properties/signals.py).
+CLAVE_CACHE_TIPOS_DISPONIBLES = 'tipos-inmueble-visibles'
+TIEMPO_CACHE_TIPOS_DISPONIBLES = 300  # segundos
+
+# Datos de las páginas públicas que se guardan en cache. No se cachea la
+# respuesta completa (cache_page) porque base.html pinta los mensajes flash
+# de cada visitante. Las señales de Property y PropertyImage invalidan las
+# entradas; el TTL solo acota cambios hechos sin señales.
+CLAVE_CACHE_GALERIA = 'galeria-propiedades:pagina-1'
+TIEMPO_CACHE_GALERIA = 60  # segundos
+TIEMPO_CACHE_DETALLE = 60  # segundos
+
+# Campos que pinta la página de detalle de una propiedad
+CAMPOS_DETALLE = (
+    'id', 'nombre', 'descripcion', 'precio', 'ubicacion', 'imagen_principal',
+    'tipo_inmueble', 'metros_cuadrados', 'fecha_creacion',
+)
+
+# Tarjetas por página de la galería pública
+PROPIEDADES_POR_PAGINA = 24
+
+# Campos que pintan las tarjetas de propiedades similares del detalle
+CAMPOS_TARJETA_SIMILAR = ('id', 'nombre', 'precio', 'imagen_principal', 'miniatura', 'ubicacion')
+
+
+def clave_cache_detalle_propiedad(property_id):
+    """
+    Construye la clave de cache del detalle de una propiedad visible.
+    """
+    return f'detalle-propiedad:{property_id}'
+
+
+def clave_cache_similares(tipo_inmueble):
+    """
+    Construye la clave de cache de las propiedades visibles más recientes de un tipo.
+    """
+    return f'propiedades-similares:{tipo_inmueble}'
+
+
+def invalidar_cache_galeria(property_id=None):
+    """
+    Elimina del cache los datos de la galería pública.
+    
+    Se borran la primera página de la galería sin filtros, los tipos
+    disponibles, las similares de todos los tipos (la propiedad pudo cambiar
+    de tipo) y, si se indica, el detalle de la propiedad modificada.
+    
+    Args:
+        property_id: int - ID de la propiedad modificada (opcional)
+    """
+    claves = [CLAVE_CACHE_GALERIA, CLAVE_CACHE_TIPOS_DISPONIBLES]
+    claves += [clave_cache_similares(tipo) for tipo, _ in Property.PROPERTY_TYPES]
+    if property_id is not None:
+        claves.append(clave_cache_detalle_propiedad(property_id))
+    cache.delete_many(claves)
+
+
+def obtener_tipos_disponibles():
+    """
+    Devuelve los tipos de inmueble que tienen propiedades visibles, con cache.
+    
+    El order_by reemplaza el ordering del modelo: si no, la fecha de creación
+    entra en el DISTINCT y los tipos salen repetidos.
+    
+    Returns:
+        list: Valores de tipo_inmueble sin repetir
+    """
+    return cache.get_or_set(
+        CLAVE_CACHE_TIPOS_DISPONIBLES,
+        lambda: list(
+            Property.objects.filter(
+                is_visible=True
+            ).order_by('tipo_inmueble').values_list('tipo_inmueble', flat=True).distinct()
+        ),
+        TIEMPO_CACHE_TIPOS_DISPONIBLES
+    )
+
+
 def property_list_view(request):
     """
     Vista de la galería de propiedades.
@@ -12,6 +93,7 @@ def property_list_view(request):
     Funcionalidades:
     - Lista todas las propiedades con is_visible=True
     - Las ordena por fecha de creación (más recientes primero)
+    - Las muestra en páginas de PROPIEDADES_POR_PAGINA tarjetas
     - Opcionalmente permite filtrar por tipo de inmueble
     - Opcionalmente permite buscar por nombre o ubicación
     """
@@ -23,8 +105,10 @@ def property_list_view(request):
     if tipo_filtro:
         propiedades = propiedades.filter(tipo_inmueble=tipo_filtro)
     
-    # Búsqueda por texto (nombre o ubicación)
-    busqueda = request.GET.get('q', None)
+    # Búsqueda por texto (nombre, ubicación o descripción). Cada término es
+    # un LIKE '%...%' sobre tres columnas que ningún índice puede acelerar,
+    # así que una búsqueda vacía o de solo espacios no se aplica
+    busqueda = request.GET.get('q', '').strip() or None
     if busqueda:
         propiedades = propiedades.filter(
             Q(nombre__icontains=busqueda) | 
@@ -32,19 +116,43 @@ def property_list_view(request):
             Q(descripcion__icontains=busqueda)
         )
     
-    # Ordenar por fecha de creación (más recientes primero)
-    propiedades = propiedades.order_by('-fecha_creacion')
+    # Ordenar por fecha de creación (más recientes primero) y leer solo los
+    # campos que muestran las tarjetas; la descripción no aparece en la galería
+    propiedades = propiedades.order_by('-fecha_creacion').only(
+        'id', 'nombre', 'tipo_inmueble', 'precio', 'ubicacion',
+        'metros_cuadrados', 'imagen_principal', 'miniatura'
+    )
+    
+    # Paginar: la consulta solo trae las filas de la página actual
+    paginator = Paginator(propiedades, PROPIEDADES_POR_PAGINA)
+    numero_pagina = request.GET.get('page')
     
-    # Contar el total de propiedades encontradas
-    total_propiedades = propiedades.count()
+    # La primera página de la galería sin filtros es la misma para todos los
+    # visitantes: se guarda en cache junto con el total (así tampoco se repite
+    # el COUNT); las búsquedas, filtros y demás páginas se consultan siempre
+    if tipo_filtro or busqueda or numero_pagina not in (None, '', '1'):
+        page_obj = paginator.get_page(numero_pagina)
+    else:
+        primera_pagina = cache.get_or_set(
+            CLAVE_CACHE_GALERIA,
+            lambda: {
+                'propiedades': list(paginator.page(1).object_list),
+                'total': paginator.count,
+            },
+            TIEMPO_CACHE_GALERIA
+        )
+        paginator.count = primera_pagina['total']
+        page_obj = Page(primera_pagina['propiedades'], 1, paginator)
+    
+    # Total de propiedades encontradas (de todas las páginas)
+    total_propiedades = paginator.count
     
     # Obtener los tipos de inmueble disponibles para el filtro
-    tipos_disponibles = Property.objects.filter(
-        is_visible=True
-    ).values_list('tipo_inmueble', flat=True).distinct()
+    tipos_disponibles = obtener_tipos_disponibles()
     
     contexto = {
-        'propiedades': propiedades,
+        'propiedades': page_obj,
+        'page_obj': page_obj,
         'total_propiedades': total_propiedades,
         'tipos_disponibles': tipos_disponibles,
         'tipo_actual': tipo_filtro,
@@ -55,33 +163,43 @@ def property_list_view(request):
     return render(request, 'property_list.html', contexto)
 
 
-def property_detail_view(request, pk):
+def obtener_datos_detalle(pk):
     """
-    Vista de detalle de una propiedad específica.
-    Muestra toda la información de la propiedad incluyendo:
-    - Datos básicos (nombre, descripción, precio, ubicación, m²)
-    - Imagen principal
-    - Galería de imágenes adicionales
-    - Botones para agendar cita (normal o prioritaria)
+    Obtiene la propiedad visible y sus imágenes para la página de detalle, con cache.
     
-    Si la propiedad no existe o no está visible, muestra error 404.
+    Args:
+        pk: int - ID de la propiedad
+        
+    Returns:
+        dict: propiedad, todas_las_imagenes (principal + adicionales) y
+        total_imagenes (número de imágenes adicionales)
+        
+    Raises:
+        Http404: Si la propiedad no existe o no está visible
     """
-    # Obtener la propiedad o mostrar 404 si no existe o no es visible
+    clave = clave_cache_detalle_propiedad(pk)
+    datos = cache.get(clave)
+    if datos is not None:
+        return datos
+    
+    # Obtener la propiedad o mostrar 404 si no existe o no es visible,
+    # leyendo solo las columnas que pinta el template (la propiedad se
+    # guarda en cache y nunca se vuelve a guardar en la base de datos)
     propiedad = get_object_or_404(
-        Property, 
+        Property.objects.only(*CAMPOS_DETALLE),
         pk=pk, 
         is_visible=True
     )
     
-    # Obtener todas las imágenes adicionales de la propiedad
-    # Ordenadas por el campo 'orden' que definimos en el modelo
-    imagenes_adicionales = propiedad.imagenes.all().order_by('orden')
-    
-    # Contar cuántas imágenes adicionales hay
-    total_imagenes = imagenes_adicionales.count()
+    # Construir una lista con TODAS las imágenes (principal + adicionales)
+    # para el carousel/slider del template. De las imágenes adicionales solo
+    # se necesita la URL: se leen las rutas con values_list (ya ordenadas por
+    # el campo 'orden' del modelo) sin construir instancias de PropertyImage
+    storage = PropertyImage._meta.get_field('imagen').storage
+    rutas_adicionales = list(
+        PropertyImage.objects.filter(property_id=propiedad.pk).values_list('imagen', flat=True)
+    )
     
-    # Crear una lista con TODAS las imágenes (principal + adicionales)
-    # Esto es útil para crear un carousel/slider en el template
     todas_las_imagenes = []
     
     # Agregar la imagen principal primero
@@ -92,24 +210,71 @@ def property_detail_view(request, pk):
         })
     
     # Agregar las imágenes adicionales
-    for imagen in imagenes_adicionales:
-        todas_las_imagenes.append({
-            'url': imagen.imagen.url,
-            'es_principal': False
-        })
+    todas_las_imagenes += [
+        {'url': storage.url(ruta), 'es_principal': False}
+        for ruta in rutas_adicionales if ruta
+    ]
+    
+    datos = {
+        'propiedad': propiedad,
+        'todas_las_imagenes': todas_las_imagenes,
+        'total_imagenes': len(rutas_adicionales),
+    }
+    cache.set(clave, datos, TIEMPO_CACHE_DETALLE)
+    return datos
+
+
+def obtener_recientes_por_tipo(tipo_inmueble):
+    """
+    Devuelve las 4 propiedades visibles más recientes de un tipo, con cache.
+    
+    Se guardan 4 para que, al excluir la propiedad que se está viendo, queden
+    3 similares. Las tarjetas no muestran la descripción, así que solo se
+    leen los campos que pintan.
+    
+    Args:
+        tipo_inmueble: str - Tipo de inmueble
+        
+    Returns:
+        list: Propiedades con los campos de CAMPOS_TARJETA_SIMILAR
+    """
+    return cache.get_or_set(
+        clave_cache_similares(tipo_inmueble),
+        lambda: list(
+            Property.objects.filter(
+                tipo_inmueble=tipo_inmueble,
+                is_visible=True
+            ).only(*CAMPOS_TARJETA_SIMILAR)[:4]
+        ),
+        TIEMPO_CACHE_DETALLE
+    )
+
+
+def property_detail_view(request, pk):
+    """
+    Vista de detalle de una propiedad específica.
+    Muestra toda la información de la propiedad incluyendo:
+    - Datos básicos (nombre, descripción, precio, ubicación, m²)
+    - Imagen principal
+    - Galería de imágenes adicionales
+    - Botones para agendar cita (normal o prioritaria)
+    
+    Si la propiedad no existe o no está visible, muestra error 404.
+    """
+    datos = obtener_datos_detalle(pk)
+    propiedad = datos['propiedad']
     
     # Obtener propiedades similares (mismo tipo de inmueble)
     # Excluir la propiedad actual y limitar a 3
-    propiedades_similares = Property.objects.filter(
-        tipo_inmueble=propiedad.tipo_inmueble,
-        is_visible=True
-    ).exclude(pk=propiedad.pk)[:3]
+    propiedades_similares = [
+        similar for similar in obtener_recientes_por_tipo(propiedad.tipo_inmueble)
+        if similar.pk != propiedad.pk
+    ][:3]
     
     contexto = {
         'propiedad': propiedad,
-        'imagenes_adicionales': imagenes_adicionales,
-        'todas_las_imagenes': todas_las_imagenes,
-        'total_imagenes': total_imagenes,
+        'todas_las_imagenes': datos['todas_las_imagenes'],
+        'total_imagenes': datos['total_imagenes'],
         'propiedades_similares': propiedades_similares,
         'titulo_pagina': propiedad.nombre
     }